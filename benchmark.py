@@ -0,0 +1,152 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import platform
+from condor.ledger import JobLedger
+from condor import NUCLIDE_TABLE, allocate_seeds, describe_jobs, render_jobs, write_macros, generate_condor_submit_batch, submit_condor_batch, check_jobs, job_includes
+
+# Stand-in condor_* executables, put first on PATH unless --real_condor is given
+FAKE_CONDOR_BIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_condor", "bin")
+
+# Isotope and volumes of the benchmark campaign; the isotope is pre-resolved so radioactivedecay isn't needed
+BENCHMARK_ISOTOPE = "Rn222"
+BENCHMARK_NUCLIDE = {"Z": 86, "A": 222, "state": "", "excitation_energy_keV": 0}
+BENCHMARK_VOLUMES = [("Shield", "0.5 0.5 0.5"), ("Camera", "0.1 0.1 0.1")]
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Time every stage of a submission against a fake Condor pool.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10000, 100000], help="Number of jobs of each benchmark run.")
+    parser.add_argument("--num_events", type=int, default=10000, help="Events per job written into the macros.")
+    parser.add_argument("--latency", type=float, default=0, help="Seconds every fake condor_* call takes.")
+    parser.add_argument("--failure_rate", type=float, default=0, help="Fraction of fake condor_* calls that fail.")
+    parser.add_argument("--completed", type=float, default=1, help="Fraction of fake jobs already completed when monitored.")
+    parser.add_argument("--real_condor", action="store_true", help="Use the condor_* executables found on PATH instead of the fake pool.")
+    parser.add_argument("--work_folder", help="Folder for the macros, submit files and ledgers, a temporary one by default.")
+    parser.add_argument("--output", default="benchmark.json", help="JSON file the timings are written to.")
+    return parser.parse_args()
+
+def benchmark_jobs(size, num_events):
+    # Split the jobs evenly between the volumes, with every tenth job a gamma background one
+    jobs = []
+    for i in range(size):
+        if i % 10 == 9:
+            jobs.append({"kind": "gamma_background", "isotope": "gamma_background", "num_events": num_events})
+        else:
+            confine, position = BENCHMARK_VOLUMES[i % len(BENCHMARK_VOLUMES)]
+            jobs.append({"kind": "radioactive", "isotope": BENCHMARK_ISOTOPE, "confine": confine, "position": position, "num_events": num_events})
+
+    return jobs
+
+def run_benchmark(size, num_events, work_folder):
+    # Fresh folders, seed state and ledger for every size
+    run_folder = os.path.join(work_folder, f"jobs_{size}")
+    shutil.rmtree(run_folder, ignore_errors=True)
+    macros_folder = os.path.join(run_folder, "macros")
+    submit_folder = os.path.join(run_folder, "submit")
+    os.makedirs(submit_folder)
+    campaign = f"benchmark_{size}"
+    jobs = benchmark_jobs(size, num_events)
+    timings = {}
+
+    # Reserve job indices and derive their seeds
+    start = time.perf_counter()
+    _, job_indices, seeds = allocate_seeds(os.path.join(run_folder, "seeds.json"), size)
+    for job, job_index, (seed1, seed2) in zip(jobs, job_indices, seeds):
+        job.update(job_index=int(job_index), seed1=int(seed1), seed2=int(seed2))
+    timings["seeds"] = time.perf_counter() - start
+
+    # Render the macros in memory
+    start = time.perf_counter()
+    describe_jobs(jobs, int(time.time()), macros_folder, campaign)
+    macros = render_jobs(jobs)
+    timings["render"] = time.perf_counter() - start
+
+    # Write them to disk
+    start = time.perf_counter()
+    write_macros(macros_folder, macros)
+    timings["write_macros"] = time.perf_counter() - start
+
+    # Write the submit file and its item list
+    names = [job["name"] for job in jobs]
+    start = time.perf_counter()
+    generate_condor_submit_batch(submit_folder, campaign, names, macros_folder=macros_folder, shared_macros=job_includes(jobs))
+    timings["submit_file"] = time.perf_counter() - start
+
+    # Submit the cluster
+    start = time.perf_counter()
+    cluster_id, job_ids = submit_condor_batch(submit_folder, campaign)
+    timings["submit"] = time.perf_counter() - start
+
+    # Record the jobs and their IDs in the ledger
+    ledger = JobLedger(os.path.join(run_folder, "jobs.sqlite"))
+    start = time.perf_counter()
+    ledger.add_jobs(jobs)
+    ledger.mark_submitted(names, job_ids)
+    timings["ledger"] = time.perf_counter() - start
+
+    # Query every job, retrieve and remove the completed ones
+    start = time.perf_counter()
+    check_jobs(ledger, campaign)
+    timings["monitor"] = time.perf_counter() - start
+    status_counts = ledger.status_counts(campaign)
+    ledger.close()
+
+    return {
+        "jobs": size,
+        "submitted": len(job_ids),
+        "status_counts": status_counts,
+        "seconds": timings,
+        "jobs_per_second": {stage: size / seconds if seconds else None for stage, seconds in timings.items()},
+        "total_seconds": sum(timings.values()),
+    }
+
+def main():
+    # Parse command-line arguments
+    args = parse_arguments()
+
+    # Point the condor_* commands at the fake pool, with its own queue state
+    work_folder = args.work_folder or tempfile.mkdtemp(prefix="cygno_benchmark_")
+    if not args.real_condor:
+        os.environ["PATH"] = FAKE_CONDOR_BIN + os.pathsep + os.environ["PATH"]
+        os.environ["FAKE_CONDOR_STATE"] = os.path.join(work_folder, "fake_condor")
+        os.environ["FAKE_CONDOR_LATENCY"] = str(args.latency)
+        os.environ["FAKE_CONDOR_FAILURE_RATE"] = str(args.failure_rate)
+        os.environ["FAKE_CONDOR_COMPLETED"] = str(args.completed)
+        shutil.rmtree(os.environ["FAKE_CONDOR_STATE"], ignore_errors=True)
+    NUCLIDE_TABLE.setdefault(BENCHMARK_ISOTOPE, BENCHMARK_NUCLIDE)
+
+    # Run the sizes from the smallest up
+    results = []
+    for size in sorted(args.sizes):
+        result = run_benchmark(size, args.num_events, work_folder)
+        results.append(result)
+        stages = ", ".join(f"{stage} {seconds:.3f}s" for stage, seconds in result["seconds"].items())
+        print(f"{size} jobs: {stages}")
+
+    # Write the timings together with what they were measured on
+    report = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "fake_condor": not args.real_condor,
+        "latency": args.latency,
+        "failure_rate": args.failure_rate,
+        "completed": args.completed,
+        "num_events": args.num_events,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"Timings written to {args.output}")
+
+    # Leave a user-given work folder in place for inspection
+    if not args.work_folder:
+        shutil.rmtree(work_folder, ignore_errors=True)
+
+# Execute the main function if the script is run directly
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import argparse
+from condor.ledger import JobLedger
+from condor.staging import commit_manifest
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Submit the batches staged with --stage in one go.")
+    parser.add_argument("stage", help="Staging folder holding the manifest, submit files and item lists.")
+    parser.add_argument("--ledger", default="jobs.sqlite", help="Job ledger recording every job and its state.")
+    return parser.parse_args()
+
+def main():
+    # Parse command-line arguments
+    args = parse_arguments()
+
+    # Record and submit every batch of the manifest that hasn't been submitted yet
+    ledger = JobLedger(args.ledger)
+    submitted = commit_manifest(args.stage, ledger)
+    ledger.close()
+
+    print(f"{submitted} staged jobs submitted.")
+
+# Execute the main function if the script is run directly
+if __name__ == "__main__":
+    main()
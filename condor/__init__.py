@@ -0,0 +1,34 @@
+import importlib
+
+# Public names of the package, by the submodule defining them. A submodule is only imported when one of its
+# names is first used, so e.g. monitor.py never loads numpy, and radioactivedecay is only loaded by nuclide_properties.
+EXPORTS = {
+    "config": ["EXECUTABLE", "INPUT_FILES", "SUBMIT_ATTRIBUTES", "SOURCE_CENTRE", "CONFIG_ENVIRONMENT", "CondorConfig", "load_settings", "get_config", "set_config"],
+    "seeds": ["SEED_BITS", "SEED_MASK", "FEISTEL_ROUNDS", "new_campaign_seed", "derive_seeds", "allocate_seeds"],
+    "nuclides": ["METASTABLE_ENERGIES", "AMBIGUOUS_METASTABLE_STATES", "NUCLIDE_TABLE", "ground_state_name", "missing_metastable_energies", "get_metastable_energy", "nuclide_properties", "load_nuclide_table", "save_nuclide_table"],
+    "macros": [
+        "thread_commands", "radioactive_macro_template", "render_geant4_macros", "write_macros", "generate_geant4_macros", "generate_geant4_macros_batch",
+        "gamma_background_macro_template", "render_geant4_gamma_bkg", "generate_geant4_gamma_bkg", "generate_geant4_gamma_bkg_batch",
+        "job_name", "describe_jobs", "job_spectrum_macro", "job_includes", "job_template", "render_jobs",
+        "MACRO_OVERLAY", "store_macro_body", "render_overlays", "remove_macros",
+    ],
+    "campaigns": ["load_campaign", "campaign_shards", "expand_campaign"],
+    "bundle": ["input_fingerprint", "walk_files", "content_hash", "reproducible_tarinfo", "build_input_bundle", "input_bundle_url", "shared_input_bundle"],
+    "submission": ["schedd_args", "condor_requests", "generate_condor_submit", "generate_condor_submit_gamma_background", "submit_condor_job", "generate_condor_submit_batch", "parse_terse_output", "submit_condor_batch", "record_batch", "submit_cluster", "submit_clusters"],
+    "monitoring": ["JOB_STATUS", "JOB_ATTRIBUTES", "cluster_constraint", "job_constraint", "query_jobs", "retrieve_completed", "remove_jobs", "resubmit_jobs", "check_jobs_async", "check_jobs"],
+    "api": ["Job", "Campaign", "Submitter"],
+}
+LOCATIONS = {name: module for module, names in EXPORTS.items() for name in names}
+__all__ = list(LOCATIONS)
+
+def __getattr__(name):
+    if name not in LOCATIONS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    # Keep the name in the package so the submodule is only looked up once
+    value = getattr(importlib.import_module(f".{LOCATIONS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(LOCATIONS))
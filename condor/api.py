@@ -0,0 +1,137 @@
+import os
+import time
+from .ledger import JobLedger
+from .planner import load_profile, resource_requests, job_configurations, split_by_threads
+from .staging import estimate_jobs, stage_batch
+from .config import get_config
+from .seeds import allocate_seeds
+from .nuclides import load_nuclide_table, save_nuclide_table
+from .campaigns import load_campaign, expand_campaign
+from .macros import describe_jobs, render_jobs, render_overlays, write_macros, job_includes
+from .bundle import build_input_bundle, input_bundle_url
+from .submission import submit_clusters
+from .monitoring import check_jobs, check_jobs_async, resubmit_jobs
+
+class Job(dict):
+    # A job is the same dict the ledger and the rendering functions work with, these only fill it in
+    @classmethod
+    def radioactive(cls, isotope, confine, position, num_events, threads=1):
+        return cls(kind="radioactive", isotope=isotope, confine=confine, position=position, num_events=num_events, threads=threads)
+
+    @classmethod
+    def gamma_background(cls, num_events, spectrum=None, threads=1):
+        from .spectra import DEFAULT_SPECTRUM
+        return cls(kind="gamma_background", isotope="gamma_background", num_events=num_events, spectrum=spectrum or DEFAULT_SPECTRUM, threads=threads)
+
+class Campaign:
+    def __init__(self, name, jobs=(), macros_folder="macros", seed_state=None, campaign_seed=None):
+        self.name = name
+        self.jobs = [Job(job) for job in jobs]
+        self.macros_folder = macros_folder
+        self.seed_state = seed_state or f"campaign_seeds_{name}.json"
+        self.campaign_seed = campaign_seed
+
+    @classmethod
+    def from_file(cls, path, profile=None):
+        # Same campaign files as submit_campaign.py, total_events entries are split with the given profile
+        campaign = load_campaign(path)
+        name = campaign.get("name", os.path.splitext(os.path.basename(path))[0])
+        return cls(name, expand_campaign(campaign, profile), campaign.get("macros_folder", "macros"), campaign_seed=campaign.get("campaign_seed"))
+
+    def add(self, job, times=1):
+        self.jobs.extend(Job(job) for _ in range(times))
+        return self
+
+class Submitter:
+    # Submits campaigns in-process, with the same seeds, macros, submit files and ledger records as the scripts
+    def __init__(self, ledger="jobs.sqlite", config=None, submit_folder=".", profile="throughput_profile.json", nuclide_table="nuclide_table.json", macro_store=None, bundle_folder=None, bundle_url=None):
+        self.ledger = JobLedger(ledger) if isinstance(ledger, str) else ledger
+        self.config = get_config(config)
+        self.submit_folder = submit_folder
+        self.profile_path = profile
+        self.profile = load_profile(profile)
+        self.nuclide_table = nuclide_table
+        self.macro_store = macro_store
+        self.bundle_folder = bundle_folder
+        self.bundle_url = bundle_url
+        load_nuclide_table(nuclide_table)
+
+    def reload_profile(self):
+        # Pick up what profile_jobs.py or monitor.py --watch measured since the submitter was created
+        self.profile = load_profile(self.profile_path)
+
+    def input_bundle(self):
+        # Built once per input version and reused by every cluster, None to transfer the inputs one by one
+        if not self.bundle_folder:
+            return None
+        return input_bundle_url(build_input_bundle(self.bundle_folder, self.config.input_files), self.bundle_url)
+
+    def prepare(self, campaign, macros_folder):
+        # Every call gives the jobs of the campaign new job indices, seeds and names
+        jobs = campaign.jobs
+        campaign.campaign_seed, job_indices, seeds = allocate_seeds(campaign.seed_state, len(jobs), campaign.campaign_seed)
+        for job, job_index, (seed1, seed2) in zip(jobs, job_indices, seeds):
+            job.update(job_index=int(job_index), seed1=int(seed1), seed2=int(seed2))
+
+        # Render and write all macros, or only the per-job overlays of the macro store
+        timestamp = int(time.time())
+        describe_jobs(jobs, timestamp, macros_folder, campaign.name)
+        if self.macro_store:
+            macros, shared_macros = render_overlays(jobs, self.macro_store, self.config)
+        else:
+            macros, shared_macros = render_jobs(jobs, self.config), job_includes(jobs)
+        write_macros(macros_folder, macros)
+        save_nuclide_table(self.nuclide_table)
+
+        return f"{campaign.name}_{timestamp}", shared_macros
+
+    def submit(self, campaign):
+        # One cluster per number of threads, recorded in the ledger like submit_campaign.py does.
+        # Returns the cluster ID and job IDs of every cluster.
+        if not campaign.jobs:
+            return []
+        batch_prefix, shared_macros = self.prepare(campaign, campaign.macros_folder)
+        input_bundle = self.input_bundle()
+
+        # Condor puts the logs and outputs next to the submit file
+        for job in campaign.jobs:
+            job["output_folder"] = os.path.abspath(self.submit_folder)
+        self.ledger.add_jobs(campaign.jobs)
+
+        return submit_clusters(self.ledger, self.submit_folder, batch_prefix, campaign.jobs, self.profile, input_bundle, campaign.macros_folder, shared_macros, bool(self.macro_store), self.config)
+
+    def stage(self, campaign, stage_folder, bytes_per_event=None, events_per_second=None):
+        # Same as --stage: one staged batch per number of threads, with the macros kept in the staging folder,
+        # commit_staged.py submits them later. Returns the estimates of every batch.
+        if not campaign.jobs:
+            return []
+        macros_folder = os.path.join(stage_folder, "macros")
+        batch_prefix, shared_macros = self.prepare(campaign, macros_folder)
+        input_bundle = self.input_bundle()
+
+        batches = []
+        for jobs in split_by_threads(campaign.jobs):
+            estimates = estimate_jobs(jobs, self.profile, input_bundle, shared_macros, bytes_per_event, self.config, events_per_second)
+            requests = resource_requests(self.profile, job_configurations(jobs))
+            stage_batch(stage_folder, f"{batch_prefix}_{jobs[0]['job_index']}", jobs, input_bundle, macros_folder, shared_macros, estimates, bool(self.macro_store), requests, self.config)
+            batches.append(estimates)
+
+        return batches
+
+    def check(self, campaign=None):
+        # Query the active jobs and retrieve the finished ones, returns their states by schedd and job ID
+        return check_jobs(self.ledger, campaign)
+
+    async def check_async(self, campaign=None):
+        # The same from inside a running event loop, e.g. a workflow daemon
+        return await check_jobs_async(self.ledger, campaign)
+
+    def resubmit(self, max_attempts=3, backoff=600, campaign=None):
+        # Failed jobs whose backoff has expired are submitted again with their original seeds
+        jobs = self.ledger.retry_candidates(max_attempts, campaign=campaign)
+        if jobs:
+            resubmit_jobs(self.ledger, jobs, self.submit_folder, backoff, self.input_bundle(), self.macro_store, self.config, self.profile)
+        return jobs
+
+    def close(self):
+        self.ledger.close()
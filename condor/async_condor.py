@@ -0,0 +1,117 @@
+import os
+import json
+import asyncio
+import subprocess
+from .timing import span
+from .submission import schedd_args, parse_terse_output
+from .monitoring import cluster_constraint
+
+# The htcondor bindings avoid forking condor_submit, but are optional
+try:
+    import htcondor
+except ImportError:
+    htcondor = None
+
+class AsyncCondor:
+    def __init__(self, schedds=None, concurrency=2, timeout=300, use_bindings=False):
+        # "" is the local schedd
+        self.schedds = list(schedds) if schedds else [""]
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.use_bindings = use_bindings and htcondor is not None
+        self.semaphores = {}
+
+    def semaphore(self, schedd):
+        # Created lazily so they belong to the running event loop
+        if schedd not in self.semaphores:
+            self.semaphores[schedd] = asyncio.Semaphore(self.concurrency)
+        return self.semaphores[schedd]
+
+    async def run(self, schedd, command, cwd=None):
+        # At most `concurrency` commands per schedd, each one killed after `timeout` seconds
+        async with self.semaphore(schedd):
+            process = await asyncio.create_subprocess_exec(*command, cwd=cwd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), self.timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, command, stdout, stderr)
+
+        return stdout.decode()
+
+    async def submit(self, schedd, submit_folder, batch_name):
+        # Submit one batch to one schedd, returns its cluster and job IDs
+        if self.use_bindings:
+            async with self.semaphore(schedd):
+                return await asyncio.wait_for(asyncio.to_thread(submit_with_bindings, schedd, submit_folder, batch_name), self.timeout)
+        command = ["condor_submit", *schedd_args(schedd), "-spool", "-terse", f"{batch_name}.submit"]
+        return parse_terse_output(await self.run(schedd, command, cwd=submit_folder))
+
+    async def submit_batches(self, submit_folder, batch_names):
+        # Every schedd runs `concurrency` workers pulling from one shared queue, so faster schedds take more batches
+        queue = asyncio.Queue()
+        for batch_name in batch_names:
+            queue.put_nowait(batch_name)
+        results = {}
+
+        async def worker(schedd):
+            while not queue.empty():
+                batch_name = queue.get_nowait()
+                try:
+                    cluster_id, job_ids = await self.submit(schedd, submit_folder, batch_name)
+                    print(f"Submitted {batch_name} to {schedd or 'the local schedd'} as cluster {cluster_id} with {len(job_ids)} jobs")
+                except (subprocess.CalledProcessError, asyncio.TimeoutError) as e:
+                    print(f"Error submitting {batch_name} to {schedd or 'the local schedd'}: {e!r}")
+                    cluster_id, job_ids = None, []
+                results[batch_name] = (schedd, cluster_id, job_ids)
+
+        await asyncio.gather(*(worker(schedd) for schedd in self.schedds for _ in range(self.concurrency)))
+
+        # Like submit_condor_batch, the submit files of accepted batches are removed
+        for batch_name, (_, cluster_id, _) in results.items():
+            if cluster_id:
+                os.remove(os.path.join(submit_folder, f"{batch_name}.submit"))
+                os.remove(os.path.join(submit_folder, f"{batch_name}.items"))
+
+        return results
+
+    async def query(self, jobs_by_schedd, attributes):
+        # All schedds at the same time: one condor_q for the jobs still in the queue, then one condor_history
+        # for the ones that already left it. Returns the job ads by job ID, per schedd.
+        async def query_schedd(schedd, job_ids):
+            constraint = cluster_constraint({job_id.split(".")[0] for job_id in job_ids})
+            ads = {}
+            with span("monitor", schedd):
+                for command in ("condor_q", "condor_history"):
+                    # condor_q/condor_history print nothing at all when no job matches
+                    output = await self.run(schedd, [command, *schedd_args(schedd), "-json", "-attributes", attributes, "-constraint", constraint])
+                    for ad in json.loads(output) if output.strip() else []:
+                        ads.setdefault(f"{ad['ClusterId']}.{ad['ProcId']}", ad)
+                    if all(job_id in ads for job_id in job_ids):
+                        break
+            return schedd, ads
+
+        return dict(await asyncio.gather(*(query_schedd(schedd, job_ids) for schedd, job_ids in jobs_by_schedd.items() if job_ids)))
+
+def submit_with_bindings(schedd, submit_folder, batch_name):
+    # Same submit description as condor_submit, handed to the schedd through the Python bindings
+    if schedd:
+        schedd_ad = htcondor.Collector().locate(htcondor.DaemonTypes.Schedd, schedd)
+        connection = htcondor.Schedd(schedd_ad)
+    else:
+        connection = htcondor.Schedd()
+    with open(os.path.join(submit_folder, f"{batch_name}.submit"), "r") as f:
+        description = htcondor.Submit(f.read().replace(f"queue name from {batch_name}.items", ""))
+    with open(os.path.join(submit_folder, f"{batch_name}.items"), "r") as f:
+        itemdata = [{"name": line.strip()} for line in f if line.strip()]
+
+    # Spooled submission, the input files are sent with the jobs
+    description["initialdir"] = os.path.abspath(submit_folder)
+    result = connection.submit(description, spool=True, itemdata=iter(itemdata))
+    connection.spool(list(description.jobs(clusterid=result.cluster(), itemdata=iter(itemdata))))
+    cluster_id = str(result.cluster())
+
+    return cluster_id, [f"{cluster_id}.{proc}" for proc in range(result.first_proc(), result.first_proc() + result.num_procs())]
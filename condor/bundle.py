@@ -0,0 +1,87 @@
+import os
+import gzip
+import json
+import hashlib
+import tarfile
+from .config import get_config
+
+def input_fingerprint(input_paths):
+    # Cheap stat-based fingerprint, so unchanged inputs are not hashed again
+    entries = []
+    for input_path in input_paths:
+        for path in sorted(walk_files(input_path)):
+            stat = os.stat(path)
+            entries.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+
+    return hashlib.sha256("\n".join(entries).encode()).hexdigest()
+
+def walk_files(input_path):
+    # A single file or every file below a directory
+    if os.path.isfile(input_path):
+        yield input_path
+        return
+    for root, _, files in os.walk(input_path):
+        for name in files:
+            yield os.path.join(root, name)
+
+def content_hash(input_paths):
+    # Hash of the relative names and contents of every input file
+    digest = hashlib.sha256()
+    for input_path in input_paths:
+        base = os.path.dirname(os.path.abspath(input_path))
+        for path in sorted(walk_files(input_path)):
+            digest.update(os.path.relpath(os.path.abspath(path), base).encode())
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+
+    return digest.hexdigest()
+
+def reproducible_tarinfo(tarinfo):
+    # Same contents give the same tar stream, whoever builds it (the gzip header is pinned in build_input_bundle)
+    tarinfo.uid = tarinfo.gid = 0
+    tarinfo.uname = tarinfo.gname = ""
+    tarinfo.mtime = 0
+    return tarinfo
+
+def build_input_bundle(bundle_folder, input_paths=None):
+    # Ensure the bundle folder exists
+    os.makedirs(bundle_folder, exist_ok=True)
+    input_paths = input_paths or get_config().input_files
+
+    # Reuse the content hash of inputs that haven't changed since the last build
+    index_path = os.path.join(bundle_folder, "bundle_index.json")
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path, "r") as f:
+            index = json.load(f)
+    fingerprint = input_fingerprint(input_paths)
+    bundle_hash = index.get(fingerprint) or content_hash(input_paths)
+
+    # One compressed archive per software/geometry version, named after its contents
+    bundle_path = os.path.join(bundle_folder, f"cygno-inputs-{bundle_hash[:16]}.tar.gz")
+    if not os.path.exists(bundle_path):
+        # "w:gz" would write the build time and file name into the gzip header, leave both out so rebuilds are byte-identical
+        with open(f"{bundle_path}.tmp", "wb") as f, gzip.GzipFile(filename="", mode="wb", fileobj=f, mtime=0) as archive, tarfile.open(fileobj=archive, mode="w") as tar:
+            for input_path in input_paths:
+                tar.add(input_path, arcname=os.path.basename(input_path.rstrip("/")), filter=reproducible_tarinfo)
+        os.replace(f"{bundle_path}.tmp", bundle_path)
+        print(f"Built input bundle {bundle_path}")
+
+    index[fingerprint] = bundle_hash
+    with open(index_path, "w") as f:
+        json.dump(index, f)
+
+    return bundle_path
+
+def input_bundle_url(bundle_path, url_base=None):
+    # Workers fetching through a URL (e.g. an HTTP cache) skip the download when they already hold this hash
+    if url_base:
+        return f"{url_base.rstrip('/')}/{os.path.basename(bundle_path)}"
+    return os.path.abspath(bundle_path)
+
+def shared_input_bundle(args):
+    # Bundle named by the driver options, or None to transfer the inputs one by one
+    if not args.bundle_folder:
+        return None
+    return input_bundle_url(build_input_bundle(args.bundle_folder), args.bundle_url)
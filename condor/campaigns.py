@@ -0,0 +1,49 @@
+from .planner import events_per_second, plan_shards
+from .config import load_settings
+
+def load_campaign(path):
+    # Campaign files come as JSON, TOML or YAML
+    return load_settings(path)
+
+def campaign_shards(entry, key, campaign, profile):
+    # Either a fixed number of jobs of a fixed size, or a total split by the measured throughput
+    total_events = entry.get("total_events")
+    if total_events is None:
+        return entry.get("jobs", campaign.get("jobs", 1)), entry.get("events_per_job", campaign.get("events_per_job"))
+
+    # Profiled rates are per thread, a multi-threaded job gets through its events that many times faster
+    rate = events_per_second(profile or {}, key, entry.get("events_per_second", campaign.get("events_per_second")), entry.get("confine"))
+    rate *= entry.get("threads", campaign.get("threads", 1))
+    return plan_shards(total_events, rate, entry.get("job_seconds", campaign.get("job_seconds", 4 * 3600)))
+
+def expand_campaign(campaign, profile=None):
+    jobs = []
+    for isotope in campaign.get("isotopes", []):
+        # Isotopes can be given as a plain name or as a table with overrides
+        if isinstance(isotope, str):
+            isotope = {"name": isotope}
+
+        for volume in campaign.get("volumes", []):
+            # Campaign-wide defaults, overridden by the isotope, overridden by the volume
+            entry = {**isotope, **volume}
+            num_jobs, num_events = campaign_shards(entry, isotope["name"], campaign, profile)
+            if num_events is None:
+                raise ValueError(f"No events_per_job given for {isotope['name']} in {volume['confine']}.")
+
+            threads = entry.get("threads", campaign.get("threads", 1))
+            job = {"kind": "radioactive", "isotope": isotope["name"], "confine": volume["confine"], "position": volume["position"], "num_events": num_events, "threads": threads}
+            jobs.extend(dict(job) for _ in range(num_jobs))
+
+    # The gamma background doesn't depend on isotopes or volumes
+    gamma_background = campaign.get("gamma_background")
+    if gamma_background:
+        num_jobs, num_events = campaign_shards(gamma_background, "gamma_background", campaign, profile)
+        if num_events is None:
+            raise ValueError("No events_per_job given for the gamma background.")
+        # spectra needs numpy, only import it for campaigns that have a gamma background
+        from .spectra import DEFAULT_SPECTRUM
+        spectrum = gamma_background.get("spectrum", DEFAULT_SPECTRUM)
+        threads = gamma_background.get("threads", campaign.get("threads", 1))
+        jobs.extend({"kind": "gamma_background", "isotope": "gamma_background", "num_events": num_events, "spectrum": spectrum, "threads": threads} for _ in range(num_jobs))
+
+    return jobs
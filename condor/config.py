@@ -0,0 +1,80 @@
+import os
+import json
+
+# Wrapper script every job runs, and the inputs every job needs besides its own macro
+EXECUTABLE = "/jupyter-workspace/private/CYGNO_04/CYGNO-MC-build/run_simulation.sh"
+INPUT_FILES = [
+    "/jupyter-workspace/private/CYGNO_04/CYGNO-MC-build/CYGNO",
+    "/jupyter-workspace/private/CYGNO_04/CYGNO-MC-build/macros",
+    "/jupyter-workspace/private/CYGNO_04/geometry",
+    "/usr/local/lib/libcadmesh.so",
+]
+
+# Extra ClassAd attributes of every job, the values are ClassAd expressions
+SUBMIT_ATTRIBUTES = {
+    "+CygnoUser": '"$ENV(USERNAME)"',
+    "+OWNER": '"condor"',
+}
+
+# Centre of the volume the radioactive sources are confined to
+SOURCE_CENTRE = "0. 97. 0. cm"
+
+# Configuration file read when no configuration was set, e.g. by a workflow daemon
+CONFIG_ENVIRONMENT = "CYGNO_CONDOR_CONFIG"
+
+def load_settings(path):
+    # The file format is picked from the extension
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        with open(path, "r") as f:
+            return json.load(f)
+    if extension == ".toml":
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    if extension in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError(f"PyYAML is required to read {path}, use JSON or TOML instead.")
+        with open(path, "r") as f:
+            return yaml.safe_load(f)
+
+    raise ValueError(f"Unsupported file format {extension}, expected .json, .toml or .yaml.")
+
+class CondorConfig:
+    def __init__(self, executable=EXECUTABLE, input_files=None, submit_attributes=None, source_centre=SOURCE_CENTRE):
+        self.executable = executable
+        self.input_files = list(INPUT_FILES if input_files is None else input_files)
+        self.submit_attributes = dict(SUBMIT_ATTRIBUTES if submit_attributes is None else submit_attributes)
+        self.source_centre = source_centre
+
+    @classmethod
+    def load(cls, path):
+        # Keys left out of the file keep their defaults
+        settings = load_settings(path)
+        unknown = set(settings) - {"executable", "input_files", "submit_attributes", "source_centre"}
+        if unknown:
+            raise ValueError(f"Unknown settings {', '.join(sorted(unknown))} in {path}.")
+        return cls(**settings)
+
+    def submit_lines(self):
+        # One "<attribute> = <value>" line per extra attribute, for the submit files
+        return "\n".join(f"{attribute} = {value}" for attribute, value in self.submit_attributes.items())
+
+# Configuration used when a function isn't given one
+CONFIG = None
+
+def set_config(config):
+    global CONFIG
+    CONFIG = config
+
+def get_config(config=None):
+    # An explicit configuration wins, then the one set for the process, then $CYGNO_CONDOR_CONFIG, then the defaults
+    global CONFIG
+    if config is not None:
+        return config
+    if CONFIG is None:
+        path = os.environ.get(CONFIG_ENVIRONMENT)
+        CONFIG = CondorConfig.load(path) if path else CondorConfig()
+    return CONFIG
@@ -0,0 +1,256 @@
+import json
+import time
+import sqlite3
+from .timing import span
+
+# Columns of a job, in the order they are inserted
+JOB_COLUMNS = ["name", "campaign", "job_index", "kind", "isotope", "confine", "position", "seed1", "seed2", "num_events", "macro", "output", "spectrum", "threads", "output_folder"]
+
+# Jobs in these states will not change anymore
+FINAL_STATUSES = ("retrieved", "merged", "removed", "submit_failed", "lost", "bad_output")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    name        TEXT PRIMARY KEY,
+    campaign    TEXT,
+    job_index   INTEGER,
+    kind        TEXT,
+    isotope     TEXT,
+    confine     TEXT,
+    position    TEXT,
+    seed1       INTEGER,
+    seed2       INTEGER,
+    num_events  INTEGER,
+    macro       TEXT,
+    output      TEXT,
+    job_id      TEXT,
+    cluster_id  INTEGER,
+    submit_time REAL,
+    status      TEXT,
+    exit_code   INTEGER,
+    hold_reason TEXT,
+    updated     REAL,
+    attempts    INTEGER DEFAULT 0,
+    next_attempt REAL,
+    schedd      TEXT,
+    spectrum    TEXT,
+    profiled    INTEGER DEFAULT 0,
+    threads     INTEGER DEFAULT 1,
+    output_folder TEXT
+);
+CREATE TABLE IF NOT EXISTS transitions (
+    name   TEXT,
+    status TEXT,
+    time   REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_campaign ON jobs (campaign);
+CREATE INDEX IF NOT EXISTS jobs_job_id ON jobs (job_id);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+CREATE INDEX IF NOT EXISTS jobs_isotope_confine_status ON jobs (isotope, confine, status);
+CREATE INDEX IF NOT EXISTS transitions_name ON transitions (name);
+"""
+
+# Columns added after the first ledgers were created, with their types
+MIGRATIONS = {
+    "attempts": "INTEGER DEFAULT 0",
+    "next_attempt": "REAL",
+    "schedd": "TEXT",
+    "spectrum": "TEXT",
+    "profiled": "INTEGER DEFAULT 0",
+    "threads": "INTEGER DEFAULT 1",
+    "output_folder": "TEXT",
+}
+
+# Jobs in these states, or finished with a non-zero exit code, can be resubmitted
+RETRY_STATUSES = ("submit_failed", "held", "lost", "bad_output")
+
+class JobLedger:
+    def __init__(self, path="jobs.sqlite"):
+        # WAL lets the monitor read while a submitter writes
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.migrate()
+
+    def migrate(self):
+        # Add the columns that ledgers created by older versions lack
+        columns = {row["name"] for row in self.connection.execute("PRAGMA table_info(jobs)")}
+        with self.connection:
+            for column, column_type in MIGRATIONS.items():
+                if column not in columns:
+                    self.connection.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+
+    def close(self):
+        self.connection.close()
+
+    def record_transitions(self, names, status, now):
+        self.connection.executemany("INSERT INTO transitions (name, status, time) VALUES (?, ?, ?)", ((name, status, now) for name in names))
+
+    def add_jobs(self, jobs):
+        # All the jobs of a campaign go in one transaction
+        now = time.time()
+        with span("ledger"), self.connection:
+            self.connection.executemany(
+                f"INSERT INTO jobs ({', '.join(JOB_COLUMNS)}, status, updated) VALUES ({', '.join('?' * len(JOB_COLUMNS))}, 'rendered', ?)",
+                ([job.get(column) for column in JOB_COLUMNS] + [now] for job in jobs),
+            )
+            self.record_transitions([job["name"] for job in jobs], "rendered", now)
+
+    def mark_submitted(self, names, job_ids, schedd=""):
+        # Jobs without a job ID failed to be submitted, "" is the local schedd
+        now = time.time()
+        submitted = list(zip(names, job_ids))
+        failed = names[len(submitted):]
+        with span("ledger"), self.connection:
+            self.connection.executemany(
+                "UPDATE jobs SET job_id = ?, cluster_id = ?, schedd = ?, submit_time = ?, status = 'submitted', updated = ? WHERE name = ?",
+                ((job_id, int(job_id.split(".")[0]), schedd, now, now, name) for name, job_id in submitted),
+            )
+            self.record_transitions([name for name, _ in submitted], "submitted", now)
+            self.connection.executemany("UPDATE jobs SET status = 'submit_failed', updated = ? WHERE name = ?", ((now, name) for name in failed))
+            self.record_transitions(failed, "submit_failed", now)
+
+    def set_status(self, names, status):
+        # Status changes decided on the submit side (output checks, merging), keyed by job name
+        now = time.time()
+        with self.connection:
+            self.connection.executemany("UPDATE jobs SET status = ?, updated = ? WHERE name = ?", ((status, now, name) for name in names))
+            self.record_transitions(names, status, now)
+
+    def update_states(self, states, schedd=None):
+        # Only the jobs whose status actually changed are written, keyed by Condor job ID
+        # (and schedd, as job IDs of different schedds overlap)
+        now = time.time()
+        # A job in a final state never moves back, e.g. when an old user log is read again
+        current = {row["job_id"]: (row["name"], row["status"]) for row in self.select(job_ids=list(states), schedd=schedd)}
+        changed = [
+            (job_id, state) for job_id, state in states.items()
+            if job_id in current and current[job_id][1] not in FINAL_STATUSES and current[job_id][1] != state["status"]
+        ]
+        with span("ledger"), self.connection:
+            self.connection.executemany(
+                "UPDATE jobs SET status = ?, exit_code = ?, hold_reason = ?, updated = ? WHERE name = ?",
+                ((state["status"], state.get("exit_code"), state.get("hold_reason"), now, current[job_id][0]) for job_id, state in changed),
+            )
+            self.connection.executemany(
+                "INSERT INTO transitions (name, status, time) VALUES (?, ?, ?)",
+                ((current[job_id][0], state["status"], now) for job_id, state in changed),
+            )
+
+        return len(changed)
+
+    def select(self, campaign=None, isotope=None, confine=None, statuses=None, job_ids=None, schedd=None):
+        # Every filter maps to an indexed column
+        clauses, values = [], []
+        if schedd is not None:
+            clauses.append("COALESCE(schedd, '') = ?")
+            values.append(schedd)
+        for column, value in (("campaign", campaign), ("isotope", isotope), ("confine", confine)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                values.append(value)
+        for column, options in (("status", statuses), ("job_id", job_ids)):
+            if options is not None:
+                options = list(options)
+                clauses.append(f"{column} IN (SELECT value FROM json_each(?))")
+                values.append(json_list(options))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        return [dict(row) for row in self.connection.execute(f"SELECT * FROM jobs{where}", values)]
+
+    def retry_candidates(self, max_attempts, now=None, campaign=None):
+        # Failed jobs with retries left whose backoff has expired
+        query = (
+            "SELECT * FROM jobs WHERE (status IN (SELECT value FROM json_each(?)) OR (status IN ('completed', 'retrieved') AND exit_code != 0))"
+            " AND COALESCE(attempts, 0) < ? AND COALESCE(next_attempt, 0) <= ?"
+        )
+        values = [json_list(RETRY_STATUSES), max_attempts, now or time.time()]
+        if campaign is not None:
+            query += " AND campaign = ?"
+            values.append(campaign)
+
+        return [dict(row) for row in self.connection.execute(query, values)]
+
+    def exhausted(self, max_attempts, campaign=None):
+        # Failed jobs that used up their retry budget
+        query = (
+            "SELECT * FROM jobs WHERE (status IN (SELECT value FROM json_each(?)) OR (status IN ('completed', 'retrieved') AND exit_code != 0))"
+            " AND COALESCE(attempts, 0) >= ?"
+        )
+        values = [json_list(RETRY_STATUSES), max_attempts]
+        if campaign is not None:
+            query += " AND campaign = ?"
+            values.append(campaign)
+
+        return [dict(row) for row in self.connection.execute(query, values)]
+
+    def mark_resubmitted(self, names, job_ids, backoff, output_folder=None, schedd=""):
+        # Count the attempt and push back the next one exponentially, whether it was accepted or not
+        now = time.time()
+        submitted = list(zip(names, job_ids))
+        failed = names[len(submitted):]
+        next_attempt = "? + ? * (1 << COALESCE(attempts, 0))"
+        with self.connection:
+            self.connection.executemany(
+                f"UPDATE jobs SET job_id = ?, cluster_id = ?, schedd = ?, output_folder = ?, submit_time = ?, status = 'submitted', exit_code = NULL, hold_reason = NULL,"
+                f" next_attempt = {next_attempt}, attempts = COALESCE(attempts, 0) + 1, updated = ? WHERE name = ?",
+                ((job_id, int(job_id.split(".")[0]), schedd, output_folder, now, now, backoff, now, name) for name, job_id in submitted),
+            )
+            self.record_transitions([name for name, _ in submitted], "resubmitted", now)
+            self.connection.executemany(
+                f"UPDATE jobs SET status = 'submit_failed', next_attempt = {next_attempt}, attempts = COALESCE(attempts, 0) + 1, updated = ? WHERE name = ?",
+                ((now, backoff, now, name) for name in failed),
+            )
+            self.record_transitions(failed, "submit_failed", now)
+
+    def active_job_ids(self, campaign=None):
+        # Jobs that were submitted and haven't reached a final state, grouped by schedd ("" is the local one)
+        query = "SELECT COALESCE(schedd, '') AS schedd, job_id FROM jobs WHERE job_id IS NOT NULL AND status NOT IN (SELECT value FROM json_each(?))"
+        values = [json_list(FINAL_STATUSES)]
+        if campaign is not None:
+            query += " AND campaign = ?"
+            values.append(campaign)
+
+        jobs = {}
+        for row in self.connection.execute(query, values):
+            jobs.setdefault(row["schedd"], []).append(row["job_id"])
+        return jobs
+
+    def status_counts(self, campaign=None):
+        query = "SELECT status, COUNT(*) AS jobs FROM jobs"
+        values = []
+        if campaign is not None:
+            query += " WHERE campaign = ?"
+            values.append(campaign)
+
+        return {row["status"]: row["jobs"] for row in self.connection.execute(f"{query} GROUP BY status", values)}
+
+    def unprofiled(self, campaign=None):
+        # Successful jobs whose logs haven't been added to the resource profile yet
+        query = "SELECT * FROM jobs WHERE status IN ('completed', 'retrieved', 'merged') AND COALESCE(exit_code, 0) = 0 AND COALESCE(profiled, 0) = 0"
+        values = []
+        if campaign is not None:
+            query += " AND campaign = ?"
+            values.append(campaign)
+
+        return [dict(row) for row in self.connection.execute(query, values)]
+
+    def mark_profiled(self, names):
+        with self.connection:
+            self.connection.executemany("UPDATE jobs SET profiled = 1 WHERE name = ?", ((name,) for name in names))
+
+    def events_done(self, isotope, confine=None):
+        # Events of the jobs that finished successfully, answered from the (isotope, confine, status) index
+        query = "SELECT COALESCE(SUM(num_events), 0) FROM jobs WHERE isotope = ? AND status IN ('completed', 'retrieved', 'merged') AND exit_code = 0"
+        values = [isotope]
+        if confine is not None:
+            query += " AND confine = ?"
+            values.append(confine)
+
+        return self.connection.execute(query, values).fetchone()[0]
+
+def json_list(values):
+    # Lists are passed to SQLite as one JSON parameter, so any number of them fits in a query
+    return json.dumps(list(values))
@@ -0,0 +1,243 @@
+import os
+import hashlib
+import functools
+import concurrent.futures
+from .timing import span
+from .config import SOURCE_CENTRE, get_config
+from .nuclides import nuclide_properties
+
+def thread_commands(threads):
+    # Worker threads have to be set before /run/initialize. The master draws the seeds of every event from
+    # /random/setSeeds, so a job gives the same events whatever its number of threads.
+    return f"/run/numberOfThreads {threads}\n" if threads > 1 else ""
+
+@functools.lru_cache(maxsize=None)
+def radioactive_macro_template(isotope, position, confine, threads=1, source_centre=SOURCE_CENTRE):
+    # Look up Z, A and the excitation energy of the isotope
+    nuclide = nuclide_properties(isotope)
+    Z = nuclide["Z"]
+    A = nuclide["A"]
+    excitation_energy_keV = nuclide["excitation_energy_keV"]
+
+    # Parse position into halfx, halfy, halfz
+    halfx, halfy, halfz = position.split()
+
+    # Define the content of the GEANT4 macro, only the per-job fields are left as placeholders
+    macro_content = f"""
+# GENERATION OF RADIOACTIVE PARTICLES
+
+{thread_commands(threads)}/run/initialize
+
+"""
+
+    # Add nucleusLimits for U238
+    if isotope == "U238":
+        macro_content += "/grdm/nucleusLimits 230 238 90 92\n"
+
+    # Append the rest of the macro content
+    macro_content += f"""
+
+# define particle or ion
+/gps/particle ion
+/gps/ion {Z} {A} 0 {excitation_energy_keV} keV  # Setting properties of the ion with excitation energy
+
+# define energy (set 0 for radioactive decaying nuclei)
+/gps/energy 0. keV
+/gps/pos/shape Para
+/gps/pos/centre {source_centre}
+/gps/pos/halfx {halfx} m
+/gps/pos/halfy {halfy} m
+/gps/pos/halfz {halfz} m
+#
+/gps/pos/type Volume
+/gps/pos/confine {confine}
+#
+#Save only events that pass that have hits in the sensitive gas
+/CYGNO/cutoutfile 1
+/CYGNO/save_hits_branches 0
+/CYGNO/registeron 0
+#
+#change these for debug
+/run/verbose 0
+/event/verbose 0
+/tracking/verbose 0
+/CYGNO/reportingfrequency 100000
+#Output file name
+/CYGNO/outfile {{name}}
+/random/setSeeds {{seed1}} {{seed2}}
+#/process/em/deexcitationIgnoreCut true
+
+# define number of events to be generated
+/run/beamOn {{num_events}}
+"""
+
+    return macro_content
+
+def render_geant4_macros(isotope, position, confine, seeds, num_events, timestamps, threads=1, config=None):
+    # The template is built once per (isotope, position, confine), each job only fills in its fields
+    template = radioactive_macro_template(isotope, position, confine, threads, get_config(config).source_centre)
+    macros = []
+    for (seed1, seed2), timestamp in zip(seeds, timestamps):
+        name = f"{isotope}_{confine}_{timestamp}"
+        with span("render", name):
+            macros.append((f"{name}.mac", template.format(name=name, seed1=seed1, seed2=seed2, num_events=num_events)))
+
+    return macros
+
+def write_macros(macros_folder, macros, max_workers=16):
+    # Ensure the macros folder exists
+    os.makedirs(macros_folder, exist_ok=True)
+
+    def write_macro(macro):
+        file_name, macro_content = macro
+        with span("write", file_name), open(os.path.join(macros_folder, file_name), "w") as f:
+            f.write(macro_content)
+
+    # Small writes are dominated by open/close latency, overlap them in a thread pool
+    if len(macros) == 1:
+        write_macro(macros[0])
+        return
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(write_macro, macros))
+
+def generate_geant4_macros(macros_folder, isotope, position, confine, seed1, seed2, num_events, timestamp, threads=1):
+    write_macros(macros_folder, render_geant4_macros(isotope, position, confine, [(seed1, seed2)], num_events, [timestamp], threads))
+
+def generate_geant4_macros_batch(macros_folder, isotope, position, confine, seeds, num_events, timestamps, threads=1):
+    write_macros(macros_folder, render_geant4_macros(isotope, position, confine, seeds, num_events, timestamps, threads))
+
+@functools.lru_cache(maxsize=None)
+def gamma_background_macro_template(spectrum_path, threads=1):
+    # Define the content of the GEANT4 gamma background macro, only the per-job fields are left as placeholders.
+    # The spectrum is not inlined, it is read from its shared include macro.
+    macro_content = f"""
+{thread_commands(threads)}/run/initialize
+
+# GENERATION OF GAMMAS
+/gps/particle gamma
+/gps/pos/type Surface
+/gps/pos/shape Sphere
+/gps/pos/centre 0. 0. 0. m
+/gps/pos/radius 3.3 m
+/gps/ang/type iso
+
+# FIXME : check normalization
+# energy [MeV]   counts/keV/sec, Hall C @LNGS unless another spectrum is given
+/control/execute {os.path.basename(spectrum_path)}
+
+# DEBUG OPTIONS
+/run/verbose 0
+/event/verbose 0
+/tracking/verbose 0
+/CYGNO/reportingfrequency 100000
+#Output file name
+/CYGNO/outfile {{name}}
+/random/setSeeds {{seed1}} {{seed2}}
+
+# define number of events to be generated
+/run/beamOn {{num_events}}
+"""
+
+    return macro_content
+
+def render_geant4_gamma_bkg(seeds, num_events, timestamps, spectrum_path, threads=1):
+    # The template is built once per spectrum, each job only fills in its fields
+    template = gamma_background_macro_template(spectrum_path, threads)
+    macros = []
+    for (seed1, seed2), timestamp in zip(seeds, timestamps):
+        name = f"gamma_background_{timestamp}"
+        with span("render", name):
+            macros.append((f"{name}.mac", template.format(name=name, seed1=seed1, seed2=seed2, num_events=num_events)))
+
+    return macros
+
+def generate_geant4_gamma_bkg(macros_folder, num_events, seed1, seed2, timestamp, spectrum=None, threads=1):
+    from .spectra import DEFAULT_SPECTRUM, spectrum_macro
+    write_macros(macros_folder, render_geant4_gamma_bkg([(seed1, seed2)], num_events, [timestamp], spectrum_macro(spectrum or DEFAULT_SPECTRUM, macros_folder), threads))
+
+def generate_geant4_gamma_bkg_batch(macros_folder, num_events, seeds, timestamps, spectrum=None, threads=1):
+    from .spectra import DEFAULT_SPECTRUM, spectrum_macro
+    write_macros(macros_folder, render_geant4_gamma_bkg(seeds, num_events, timestamps, spectrum_macro(spectrum or DEFAULT_SPECTRUM, macros_folder), threads))
+
+def job_name(job, timestamp):
+    # Same names as the single-kind drivers, the job index keeps them unique
+    if job["kind"] == "gamma_background":
+        return f"gamma_background_{timestamp}_{job['job_index']}"
+    return f"{job['isotope']}_{job['confine']}_{timestamp}_{job['job_index']}"
+
+def describe_jobs(jobs, timestamp, macros_folder, campaign):
+    # Names and files of each job, as recorded in the job ledger
+    for job in jobs:
+        name = job_name(job, timestamp)
+        job.update(name=name, campaign=campaign, macro=os.path.join(macros_folder, f"{name}.mac"), output=f"{name}.root")
+
+    return jobs
+
+def job_spectrum_macro(job, include_folder=None):
+    # Spectrum include of a gamma background job, written next to its macro unless a folder is given.
+    # spectra needs numpy, so it is only imported once a gamma background job is rendered.
+    from .spectra import DEFAULT_SPECTRUM, spectrum_macro
+    return spectrum_macro(job.get("spectrum") or DEFAULT_SPECTRUM, include_folder or os.path.dirname(job["macro"]))
+
+def job_includes(jobs, include_folder=None):
+    # Include macros that have to be shipped along with the macros of the jobs
+    return sorted({job_spectrum_macro(job, include_folder) for job in jobs if job["kind"] == "gamma_background"})
+
+def job_template(job, include_folder=None, config=None):
+    if job["kind"] == "gamma_background":
+        return gamma_background_macro_template(job_spectrum_macro(job, include_folder), job.get("threads") or 1)
+    return radioactive_macro_template(job["isotope"], job["position"], job["confine"], job.get("threads") or 1, get_config(config).source_centre)
+
+def render_jobs(jobs, config=None):
+    # Templates are cached, so mixing isotopes and volumes costs one template per configuration
+    macros = []
+    for job in jobs:
+        with span("render", job["name"]):
+            macro_content = job_template(job, config=config).format(name=job["name"], seed1=job["seed1"], seed2=job["seed2"], num_events=job["num_events"])
+            macros.append((f"{job['name']}.mac", macro_content))
+
+    return macros
+
+# Per-job macro of the macro store: the job's own fields as GEANT4 aliases, then the shared body
+MACRO_OVERLAY = """/control/alias name {name}
+/control/alias seed1 {seed1}
+/control/alias seed2 {seed2}
+/control/execute {body}
+"""
+
+def store_macro_body(store_folder, template, num_events):
+    # Name and seeds are left as {name}, {seed1} and {seed2} GEANT4 alias references
+    body = template.format(name="{name}", seed1="{seed1}", seed2="{seed2}", num_events=num_events)
+
+    # Bodies are named after their content, so a configuration is only ever written once, whatever the campaign
+    path = os.path.join(store_folder, f"body_{hashlib.sha256(body.encode()).hexdigest()[:16]}.mac")
+    if not os.path.exists(path):
+        os.makedirs(store_folder, exist_ok=True)
+        # Write under a temporary name first so concurrent submitters never see a partial body
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w") as f:
+            f.write(body)
+        os.replace(temporary_path, path)
+
+    return path
+
+def render_overlays(jobs, store_folder, config=None):
+    # One shared body per configuration and number of events, each job only gets a few-line overlay
+    bodies = {}
+    macros = []
+    for job in jobs:
+        with span("render", job["name"]):
+            key = (job_template(job, store_folder, config), job["num_events"])
+            if key not in bodies:
+                bodies[key] = store_macro_body(store_folder, *key)
+            overlay = MACRO_OVERLAY.format(name=job["name"], seed1=job["seed1"], seed2=job["seed2"], body=os.path.basename(bodies[key]))
+            macros.append((f"{job['name']}.mac", overlay))
+
+    # The bodies and their spectra have to be shipped along with the overlays
+    return macros, sorted(set(bodies.values())) + job_includes(jobs, store_folder)
+
+def remove_macros(jobs):
+    # Spooled jobs carry their own copy of the macro, the overlay can be recreated from the ledger when needed
+    for job in jobs:
+        if os.path.exists(job["macro"]):
+            os.remove(job["macro"])
@@ -0,0 +1,157 @@
+import os
+import time
+import asyncio
+import subprocess
+from .timing import span
+from .planner import resource_requests, job_configurations
+from .macros import render_jobs, render_overlays, write_macros, job_includes
+from .submission import schedd_args, submit_cluster
+
+JOB_STATUS = {
+    1: "idle",
+    2: "running",
+    3: "removed",
+    4: "completed",
+    5: "held",
+    6: "transferring_output",
+    7: "suspended",
+}
+
+# Attributes fetched by the bulk queries
+JOB_ATTRIBUTES = "ClusterId,ProcId,JobStatus,ExitCode,HoldReason"
+
+def cluster_constraint(clusters):
+    # One ClassAd expression selecting every job of the given clusters
+    return " || ".join(f"ClusterId == {cluster}" for cluster in sorted(clusters, key=int))
+
+def job_constraint(job_ids):
+    # One ClassAd expression selecting exactly the given jobs, not the rest of their clusters
+    procs = {}
+    for job_id in job_ids:
+        cluster, proc = job_id.split(".")
+        procs.setdefault(cluster, []).append(proc)
+    return " || ".join(
+        f"(ClusterId == {cluster} && ({' || '.join(f'ProcId == {proc}' for proc in sorted(procs[cluster], key=int))}))"
+        for cluster in sorted(procs, key=int)
+    )
+
+async def query_jobs(jobs_by_schedd, timeout=300):
+    # Every schedd is queried at the same time by the asyncio engine, awaited so it also runs inside a daemon's event loop
+    from .async_condor import AsyncCondor
+    ads_by_schedd = await AsyncCondor(list(jobs_by_schedd), timeout=timeout).query(jobs_by_schedd, JOB_ATTRIBUTES)
+
+    # Keep only the tracked jobs, with a readable status, per schedd as job IDs of different schedds overlap
+    return {
+        schedd: {
+            job_id: {
+                "status": JOB_STATUS.get(ads[job_id].get("JobStatus"), "unknown") if job_id in ads else "not_found",
+                "exit_code": ads.get(job_id, {}).get("ExitCode"),
+                "hold_reason": ads.get(job_id, {}).get("HoldReason"),
+            }
+            for job_id in jobs_by_schedd[schedd]
+        }
+        for schedd, ads in ads_by_schedd.items()
+    }
+
+def retrieve_completed(job_ids, schedd=None):
+    # One transfer and one removal for all the jobs, limited to them so a job completing in the meantime is
+    # left for the next sweep instead of being removed without being marked retrieved
+    if not job_ids:
+        return
+    constraint = f"({job_constraint(job_ids)}) && JobStatus == 4"
+
+    # Run condor_transfer_data to retrieve the output files of every completed job
+    with span("retrieve", schedd):
+        subprocess.run(["condor_transfer_data", *schedd_args(schedd), "-constraint", constraint], check=True)
+
+    # Only remove jobs whose output has actually been staged out, so a job completing in between is kept
+    with span("remove", schedd):
+        subprocess.run(["condor_rm", *schedd_args(schedd), "-constraint", f"{constraint} && StageOutFinish > 0"], check=True)
+
+def remove_jobs(job_ids, schedd=None):
+    # One condor_rm for any number of jobs of a schedd
+    if job_ids:
+        subprocess.run(["condor_rm", *schedd_args(schedd), *job_ids], check=True)
+
+def resubmit_jobs(ledger, jobs, submit_folder, backoff, input_bundle=None, macro_store=None, config=None, profile=None):
+    # Held jobs are still in the queue of the schedd they were submitted to, remove them before they are replaced
+    held = {}
+    for job in jobs:
+        if job["status"] == "held" and job["job_id"]:
+            held.setdefault(job.get("schedd") or "", []).append(job["job_id"])
+    for schedd, job_ids in held.items():
+        remove_jobs(job_ids, schedd)
+
+    # Re-render missing macros from the recorded seeds, so the resubmitted jobs reproduce the original ones
+    by_folder = {}
+    for job in jobs:
+        by_folder.setdefault((os.path.dirname(job["macro"]), job.get("threads") or 1, job.get("schedd") or ""), []).append(job)
+
+    # One cluster per macro folder, number of threads and schedd, with the original job names on the schedd they were submitted to
+    for (macros_folder, _, schedd), folder_jobs in by_folder.items():
+        # Overlays are cheap, with a macro store they are always rendered again together with the bodies they need
+        shared_macros = []
+        if macro_store:
+            macros, shared_macros = render_overlays(folder_jobs, macro_store, config)
+            write_macros(macros_folder, macros)
+        else:
+            missing = [job for job in folder_jobs if not os.path.exists(job["macro"])]
+            if missing:
+                write_macros(macros_folder, render_jobs(missing, config))
+            shared_macros = job_includes(folder_jobs)
+        batch_name = f"resubmit_{int(time.time())}_{folder_jobs[0]['job_index']}"
+        requests = resource_requests(profile or {}, job_configurations(folder_jobs))
+        # Condor puts the outputs of the new jobs next to their submit file
+        cluster_id, job_ids = submit_cluster(ledger, submit_folder, batch_name, folder_jobs, input_bundle, macros_folder, shared_macros, requests, bool(macro_store), config, schedd, backoff)
+        if cluster_id:
+            print(f"Resubmitted {len(job_ids)} jobs as cluster {cluster_id}.")
+        else:
+            print(f"Failed to resubmit {len(folder_jobs)} jobs.")
+
+async def check_jobs_async(ledger, campaign=None):
+    # Job IDs of every submitted job that hasn't reached a final state, per schedd
+    jobs_by_schedd = ledger.active_job_ids(campaign)
+    if not jobs_by_schedd:
+        print("No active jobs found.")
+        return {}
+
+    try:
+        # Get the state of all tracked jobs of every schedd at once
+        all_states = await query_jobs(jobs_by_schedd)
+        for schedd, states in all_states.items():
+            # Record the changes
+            for state in states.values():
+                # Jobs in neither the queue nor the history are gone for good
+                if state["status"] == "not_found":
+                    state["status"] = "lost"
+            ledger.update_states(states, schedd)
+            for job_id, state in states.items():
+                if state["status"] == "held":
+                    print(f"Job {job_id} is held: {state['hold_reason']}")
+
+            # Retrieve the outputs of the completed jobs and remove them from the queue
+            completed = [job_id for job_id, state in states.items() if state["status"] == "completed"]
+            if completed:
+                try:
+                    # The transfers fork condor commands, a thread keeps the event loop free meanwhile
+                    await asyncio.to_thread(retrieve_completed, completed, schedd)
+                    ledger.update_states({job_id: dict(states[job_id], status="retrieved") for job_id in completed}, schedd)
+                    print(f"Retrieved the output of {len(completed)} finished jobs.")
+                except subprocess.CalledProcessError as e:
+                    # They stay completed and are retried on the next check, the other schedds go on
+                    print(f"Error retrieving {len(completed)} finished jobs: {e}")
+
+        # Summarize by status
+        print(", ".join(f"{count} {status}" for status, count in sorted(ledger.status_counts(campaign).items())))
+
+        return all_states
+    except subprocess.CalledProcessError as e:
+        print(f"Error querying jobs: {e}")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+
+    return {}
+
+def check_jobs(ledger, campaign=None):
+    # Blocking entry point of the scripts, daemons with their own event loop await check_jobs_async instead
+    return asyncio.run(check_jobs_async(ledger, campaign))
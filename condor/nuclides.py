@@ -0,0 +1,335 @@
+import os
+import re
+import json
+from .timing import span
+
+# Excitation energies in keV of the metastable states in the ICRP-107 decay dataset used by
+# radioactivedecay, keyed by ground state. Taken from the AME2020/NUBASE2020 atomic masses the
+# dataset ships (isomer minus ground state mass), or from NUBASE2020 when the dataset has no ground state.
+METASTABLE_ENERGIES = {
+    "Ag100": {'m': 15.52},
+    "Ag102": {'m': 9.4},
+    "Ag104": {'m': 6.9},
+    "Ag105": {'m': 25.468},
+    "Ag106": {'m': 89.66},
+    "Ag108": {'m': 109.466},
+    "Ag109": {'m': 88.0337},
+    "Ag110": {'m': 117.59},
+    "Ag111": {'m': 59.82},
+    "Ag113": {'m': 43.5},
+    "Am242": {'m': 48.6},
+    "Am244": {'m': 89.3},
+    "Am246": {'m': 30.0},
+    "Au193": {'m': 290.2},
+    "Au195": {'m': 318.58},
+    "Au196": {'m': 595.66},
+    "Au198": {'m': 811.9},
+    "Au200": {'m': 1010.0},
+    "Ba129": {'m': 8.42},
+    "Ba131": {'m': 187.995},
+    "Ba133": {'m': 288.252},
+    "Ba135": {'m': 268.218},
+    "Ba137": {'m': 661.659},
+    "Bi210": {'m': 271.31},
+    "Bi212": {'n': 1479.0},
+    "Br74": {'m': 13.58},
+    "Br76": {'m': 102.58},
+    "Br77": {'m': 105.86},
+    "Br80": {'m': 85.843},
+    "Br82": {'m': 45.9492},
+    "Br84": {'m': 310.0},
+    "Cd111": {'m': 396.214},
+    "Cd113": {'m': 263.54},
+    "Cd115": {'m': 181.0},
+    "Cd117": {'m': 136.4},
+    "Cd119": {'m': 146.54},
+    "Ce133": {'m': 37.2},
+    "Ce137": {'m': 254.29},
+    "Cl34": {'m': 146.36},
+    "Co54": {'m': 197.57},
+    "Co58": {'m': 24.95},
+    "Co60": {'m': 58.59},
+    "Co62": {'m': 22.0},
+    "Cs121": {'m': 68.5},
+    "Cs130": {'m': 163.25},
+    "Cs134": {'m': 138.7441},
+    "Cs135": {'m': 1632.9},
+    "Cs138": {'m': 79.9},
+    "Dy165": {'m': 108.1552},
+    "Er167": {'m': 207.801},
+    "Es250": {'m': 200.0},
+    "Es254": {'m': 80.4},
+    "Eu142": {'m': 450.0},
+    "Eu150": {'m': 41.7},
+    "Eu152": {'m': 45.5998, 'n': 147.86},
+    "Eu154": {'m': 145.3},
+    "Fe53": {'m': 3040.4},
+    "Gd143": {'m': 152.6},
+    "Gd145": {'m': 749.1},
+    "Hf177": {'m': 2740.02},
+    "Hf178": {'m': 2446.09},
+    "Hf179": {'m': 1106.412},
+    "Hf180": {'m': 1141.552},
+    "Hf182": {'m': 1172.87},
+    "Hg191": {'m': 128.0},
+    "Hg193": {'m': 140.76},
+    "Hg195": {'m': 176.07},
+    "Hg197": {'m': 298.93},
+    "Hg199": {'m': 532.48},
+    "Ho153": {'m': 68.7},
+    "Ho154": {'m': 243.0},
+    "Ho162": {'m': 105.87},
+    "Ho164": {'m': 139.78},
+    "Ho166": {'m': 5.969},
+    "Ho168": {'m': 59.0},
+    "I118": {'m': 188.8},
+    "I120": {'m': 320.0},
+    "I130": {'m': 39.9525},
+    "I132": {'m': 110.0},
+    "I134": {'m': 316.49},
+    "In106": {'m': 28.6},
+    "In108": {'m': 29.75},
+    "In109": {'m': 649.79},
+    "In110": {'m': 62.08},
+    "In111": {'m': 536.99},
+    "In112": {'m': 156.592},
+    "In113": {'m': 391.699},
+    "In114": {'m': 190.2682},
+    "In115": {'m': 336.244},
+    "In116": {'m': 127.267},
+    "In117": {'m': 315.303},
+    "In118": {'m': 100.0},
+    "In119": {'m': 311.37},
+    "In121": {'m': 313.68},
+    "Ir186": {'m': 0.8},
+    "Ir190": {'m': 26.1, 'n': 376.4},
+    "Ir191": {'m': 171.29},
+    "Ir192": {'m': 56.72, 'n': 168.14},
+    "Ir193": {'m': 80.238},
+    "Ir194": {'m': 370.0},
+    "Ir195": {'m': 100.0},
+    "Ir196": {'m': 210.0},
+    "Kr81": {'m': 190.64},
+    "Kr83": {'m': 41.5575},
+    "Kr85": {'m': 304.871},
+    "La132": {'m': 188.2},
+    "Lu169": {'m': 29.0},
+    "Lu171": {'m': 71.13},
+    "Lu172": {'m': 41.86},
+    "Lu174": {'m': 170.83},
+    "Lu176": {'m': 122.845},
+    "Lu177": {'m': 970.1757},
+    "Lu178": {'m': 123.8},
+    "Mn50": {'m': 225.31},
+    "Mn52": {'m': 377.749},
+    "Mn58": {'m': 71.77},
+    "Mo91": {'m': 653.01},
+    "Mo93": {'m': 2424.95},
+    "Nb88": {'m': 130.0},
+    "Nb91": {'m': 104.6},
+    "Nb92": {'m': 135.5},
+    "Nb93": {'m': 30.76},
+    "Nb94": {'m': 40.892},
+    "Nb95": {'m': 235.69},
+    "Nb98": {'m': 84.0},
+    "Nb99": {'m': 365.27},
+    "Nd139": {'m': 231.16},
+    "Nd141": {'m': 756.51},
+    "Np236": {'m': 60.0},
+    "Np240": {'m': 18.0},
+    "Np242": {'m': 50.0},
+    "Os183": {'m': 170.73},
+    "Os189": {'m': 30.82},
+    "Os190": {'m': 1705.7},
+    "Os191": {'m': 74.382},
+    "Pa234": {'m': 79.0},
+    "Pb195": {'m': 202.9},
+    "Pb197": {'m': 319.31},
+    "Pb201": {'m': 629.1},
+    "Pb202": {'m': 2169.85},
+    "Pb204": {'m': 2185.88},
+    "Pd109": {'m': 188.9903},
+    "Pm137": {'m': 160.0},
+    "Pm140": {'m': 429.0},
+    "Pm148": {'m': 137.9},
+    "Pm152": {'m': 140.0},
+    "Pm154": {'m': 230.0},
+    "Po212": {'m': 2923.0},
+    "Pr138": {'m': 350.0},
+    "Pr142": {'m': 3.694},
+    "Pr144": {'m': 59.03},
+    "Pr148": {'m': 76.8},
+    "Pt193": {'m': 149.78},
+    "Pt195": {'m': 259.077},
+    "Pt197": {'m': 399.59},
+    "Rb78": {'m': 111.19},
+    "Rb81": {'m': 86.31},
+    "Rb82": {'m': 69.0},
+    "Rb84": {'m': 463.59},
+    "Rb86": {'m': 556.05},
+    "Rb90": {'m': 106.9},
+    "Re182": {'m': 60.0},
+    "Re184": {'m': 188.0463},
+    "Re186": {'m': 148.2},
+    "Re188": {'m': 172.0848},
+    "Re190": {'m': 204.0},
+    "Rh95": {'m': 543.3},
+    "Rh96": {'m': 51.98},
+    "Rh97": {'m': 258.76},
+    "Rh99": {'m': 64.4},
+    "Rh100": {'m': 107.6},
+    "Rh101": {'m': 157.32},
+    "Rh102": {'m': 140.73},
+    "Rh103": {'m': 39.753},
+    "Rh104": {'m': 128.9679},
+    "Rh106": {'m': 132.0},
+    "Sb116": {'m': 390.0},
+    "Sb118": {'m': 250.0},
+    "Sb122": {'m': 163.5591},
+    "Sb124": {'m': 10.8627, 'n': 36.844},
+    "Sb126": {'m': 17.7},
+    "Sb128": {'m': 10.0},
+    "Sb130": {'m': 4.8},
+    "Sc42": {'m': 616.81},
+    "Sc44": {'m': 271.24},
+    "Se73": {'m': 25.71},
+    "Se77": {'m': 161.9223},
+    "Se79": {'m': 95.77},
+    "Se81": {'m': 103.0},
+    "Se83": {'m': 228.92},
+    "Sm141": {'m': 175.9},
+    "Sm143": {'m': 753.99},
+    "Sn113": {'m': 77.389},
+    "Sn117": {'m': 314.58},
+    "Sn119": {'m': 89.531},
+    "Sn121": {'m': 6.31},
+    "Sn123": {'m': 24.6},
+    "Sn125": {'m': 27.5},
+    "Sn127": {'m': 5.07},
+    "Sn130": {'m': 1946.88},
+    "Sr85": {'m': 238.79},
+    "Sr87": {'m': 388.5287},
+    "Ta180": {'m': 75.3},
+    "Ta182": {'m': 519.577},
+    "Tb147": {'m': 50.6},
+    "Tb148": {'m': 90.1},
+    "Tb149": {'m': 35.78},
+    "Tb150": {'m': 461.0},
+    "Tb151": {'m': 99.53},
+    "Tb152": {'m': 501.74},
+    "Tb156": {'m': 100.0, 'n': 88.4},
+    "Tc91": {'m': 139.3},
+    "Tc93": {'m': 391.84},
+    "Tc94": {'m': 76.0},
+    "Tc95": {'m': 38.91},
+    "Tc96": {'m': 34.23},
+    "Tc97": {'m': 96.57},
+    "Tc99": {'m': 142.6836},
+    "Tc102": {'m': 50.0},
+    "Te115": {'m': 10.0},
+    "Te119": {'m': 260.96},
+    "Te121": {'m': 293.974},
+    "Te123": {'m': 247.47},
+    "Te125": {'m': 144.775},
+    "Te127": {'m': 88.23},
+    "Te129": {'m': 105.51},
+    "Te131": {'m': 182.258},
+    "Te133": {'m': 334.26},
+    "Tl190": {'m': 70.0},
+    "Tl194": {'m': 260.0},
+    "Tl198": {'m': 543.6},
+    "Tl206": {'m': 2643.1},
+    "U235": {'m': 0.0767},
+    "W179": {'m': 221.91},
+    "W185": {'m': 197.383},
+    "Xe127": {'m': 297.1},
+    "Xe129": {'m': 236.14},
+    "Xe131": {'m': 163.93},
+    "Xe133": {'m': 233.221},
+    "Xe135": {'m': 526.551},
+    "Y83": {'m': 62.04},
+    "Y85": {'m': 19.68},
+    "Y86": {'m': 218.21},
+    "Y87": {'m': 380.82},
+    "Y89": {'m': 908.97},
+    "Y90": {'m': 682.01},
+    "Y91": {'m': 555.58},
+    "Zn69": {'m': 438.636},
+    "Zn71": {'m': 157.7},
+    "Zr89": {'m': 587.82},
+}
+
+# Dataset states left out on purpose: NUBASE2020 puts them at or below the state the dataset calls the
+# ground state, so there is no excitation energy to give Geant4
+AMBIGUOUS_METASTABLE_STATES = ("Bk-248m", "Ta-178m", "Pr-134m", "Sb-120m", "Nb-89m", "Y-84m")
+
+# Z, A, state and excitation energy of every isotope resolved in this process
+NUCLIDE_TABLE = {}
+
+def ground_state_name(isotope):
+    # Accept "Ag108m", "Ag-108m" and "108mAg" spellings, all map to "Ag108"
+    match = re.fullmatch(r"([A-Za-z]{1,2})-?(\d+)[a-z]?|(\d+)[a-z]?([A-Za-z]{1,2})", isotope)
+    if not match:
+        return isotope
+    symbol, mass_number = (match.group(1), match.group(2)) if match.group(1) else (match.group(4), match.group(3))
+    return f"{symbol.capitalize()}{mass_number}"
+
+def missing_metastable_energies():
+    # Metastable states of the radioactivedecay dataset with no entry in METASTABLE_ENERGIES, empty unless the dataset changed
+    from radioactivedecay import DEFAULTDATA
+
+    missing = []
+    for name in DEFAULTDATA.nuclides:
+        state = name.split("-")[1].lstrip("0123456789")
+        if state and name not in AMBIGUOUS_METASTABLE_STATES and state not in METASTABLE_ENERGIES.get(ground_state_name(name), {}):
+            missing.append(name)
+    return missing
+
+def get_metastable_energy(isotope, metastable_state):
+    ground_state = ground_state_name(isotope)
+
+    # Check if the isotope and its metastable state are known
+    if metastable_state not in METASTABLE_ENERGIES.get(ground_state, {}):
+        raise ValueError(f"Metastable state {metastable_state} of isotope {isotope} not found in metastable energy database.")
+
+    return METASTABLE_ENERGIES[ground_state][metastable_state]
+
+def with_excitation_energy(isotope, Z, A, state):
+    # The excitation energy of metastable states (in keV) always comes from METASTABLE_ENERGIES, 0 for ground states
+    excitation_energy_keV = get_metastable_energy(isotope, state) if state else 0
+    return {"Z": Z, "A": A, "state": state, "excitation_energy_keV": excitation_energy_keV}
+
+def nuclide_properties(isotope):
+    # Each isotope is resolved once per process
+    if isotope not in NUCLIDE_TABLE:
+        with span("nuclide", isotope):
+            # radioactivedecay is slow to import, only pay for it when an isotope is not in the table
+            from radioactivedecay.nuclide import Nuclide
+
+            # Extract Z, A, and energy state from a Nuclide instance
+            nuclide = Nuclide(isotope)
+
+        NUCLIDE_TABLE[isotope] = with_excitation_energy(isotope, nuclide.Z, nuclide.A, nuclide.state)
+
+    return NUCLIDE_TABLE[isotope]
+
+def load_nuclide_table(path):
+    # Merge a previously saved table, a missing file just means nothing is cached yet
+    if not os.path.exists(path):
+        return
+    with open(path, "r") as f:
+        table = json.load(f)
+
+    # Only Z, A and the state are taken from the file, so a table saved before METASTABLE_ENERGIES changed
+    # never keeps an old energy; an isotope whose state has no energy any more is resolved again, and fails there
+    for isotope, nuclide in table.items():
+        try:
+            NUCLIDE_TABLE.setdefault(isotope, with_excitation_energy(isotope, nuclide["Z"], nuclide["A"], nuclide["state"]))
+        except ValueError:
+            continue
+
+def save_nuclide_table(path):
+    # The excitation energies are left out, they are read from METASTABLE_ENERGIES when the table is loaded
+    table = {isotope: {"Z": nuclide["Z"], "A": nuclide["A"], "state": nuclide["state"]} for isotope, nuclide in NUCLIDE_TABLE.items()}
+    with open(path, "w") as f:
+        json.dump(table, f, indent=1, sort_keys=True)
@@ -0,0 +1,141 @@
+import os
+import json
+import math
+
+# Jobs shorter than this spend most of their time in /run/initialize and input transfer
+MIN_EVENTS_PER_SHARD = 1000
+
+# Headroom on top of the peak memory and disk measured for a configuration
+REQUEST_MARGIN = 1.25
+
+# Worker threads of a multi-threaded job share geometry and physics tables, each extra thread only adds
+# about this fraction of the memory of a single-threaded job
+THREAD_MEMORY_FRACTION = 0.25
+
+def load_profile(path):
+    # Measured throughput per isotope (or "gamma_background"), empty until jobs have finished
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+def save_profile(profile, path):
+    # Write under a temporary name first, so a failed write never leaves a truncated profile behind
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "w") as f:
+        json.dump(profile, f, indent=1, sort_keys=True)
+    os.replace(temporary_path, path)
+
+def profile_key(key, confine=None):
+    # Per-volume entries are written by profile_jobs.py, per-isotope ones by monitor.py --watch
+    return f"{key}/{confine}" if confine else key
+
+def profile_entry(profile, key, confine=None):
+    # The entry of the volume when it has been measured, the one of the whole isotope otherwise
+    return profile.get(profile_key(key, confine)) or profile.get(key)
+
+def events_per_second(profile, key, default=None, confine=None):
+    # Accumulated events over accumulated wall time of the finished jobs
+    entry = profile_entry(profile, key, confine)
+    if entry and entry["seconds"] > 0:
+        return entry["events"] / entry["seconds"]
+    if default is None:
+        raise ValueError(f"No throughput measured yet for {key}, give an initial events per second.")
+    return default
+
+def update_profile(profile, samples):
+    # Each sample is (key, events, wall seconds) of one finished job
+    for key, events, seconds in samples:
+        entry = profile.setdefault(key, {"events": 0, "seconds": 0.0, "jobs": 0})
+        entry["events"] += events
+        entry["seconds"] += seconds
+        entry["jobs"] += 1
+
+    return profile
+
+def bytes_per_event(profile, key, confine=None):
+    # Output size per event, None until outputs have been measured
+    entry = profile_entry(profile, key, confine)
+    if entry and entry.get("output_events"):
+        return entry["output_bytes"] / entry["output_events"]
+    return None
+
+def update_resources(profile, samples):
+    # Each sample is a dict with the key, events and wall seconds of one finished job and whatever usage was measured
+    for sample in samples:
+        entry = profile.setdefault(sample["key"], {"events": 0, "seconds": 0.0, "jobs": 0})
+        entry["events"] += sample["events"]
+        entry["seconds"] += sample["seconds"]
+        entry["jobs"] += 1
+
+        # Peaks are what a slot has to fit, outputs are accumulated for the bytes per event
+        for field in ("memory_mb", "disk_kb", "cpus"):
+            if sample.get(field) is not None:
+                entry[field] = max(entry.get(field, 0), sample[field])
+        if sample.get("output_bytes") is not None:
+            entry["output_bytes"] = entry.get("output_bytes", 0) + sample["output_bytes"]
+            entry["output_events"] = entry.get("output_events", 0) + sample["events"]
+        entry["exceptions"] = entry.get("exceptions", 0) + sample.get("exceptions", 0)
+
+    return profile
+
+def thread_memory_factor(threads):
+    # Memory of a job with this many threads relative to a single-threaded one
+    return 1 + (threads - 1) * THREAD_MEMORY_FRACTION
+
+def resource_requests(profile, configurations, margin=REQUEST_MARGIN):
+    # Condor requests fitting the most demanding (key, confine, events per job, threads) of a cluster.
+    # The profile holds single-threaded figures, so they are scaled up to the threads of each job.
+    memory_mb = disk_kb = cpus = 0
+    for key, confine, num_events, threads in configurations:
+        entry = profile_entry(profile, key, confine) or {}
+        memory_mb = max(memory_mb, entry.get("memory_mb", 0) * thread_memory_factor(threads))
+        cpus = max(cpus, entry.get("cpus", 0) * threads, threads if threads > 1 else 0)
+
+        # The sandbox holds the output on top of the inputs seen in earlier jobs
+        output_kb = (bytes_per_event(profile, key, confine) or 0) * num_events / 1024
+        disk_kb = max(disk_kb, entry.get("disk_kb", 0), output_kb)
+
+    requests = {}
+    if memory_mb:
+        requests["request_memory"] = math.ceil(memory_mb * margin)
+    if disk_kb:
+        requests["request_disk"] = math.ceil(disk_kb * margin)
+    if cpus:
+        requests["request_cpus"] = max(1, round(cpus))
+    return requests
+
+def split_by_threads(jobs):
+    # Every job of a cluster gets the same requests, so jobs with different numbers of threads go to separate clusters
+    groups = {}
+    for job in jobs:
+        groups.setdefault(job.get("threads") or 1, []).append(job)
+    return list(groups.values())
+
+def job_configurations(jobs):
+    # Distinct (key, confine, events per job, threads) of a list of jobs, as taken by resource_requests
+    return {(job.get("isotope") or job["kind"], job.get("confine"), job["num_events"], job.get("threads") or 1) for job in jobs}
+
+def plan_shards(total_events, rate, target_seconds, min_events=MIN_EVENTS_PER_SHARD, max_shards=None):
+    # As many events as fit in the target wall time, but not so few that startup dominates
+    events_per_shard = max(min_events, int(rate * target_seconds))
+    num_shards = math.ceil(total_events / events_per_shard)
+    if max_shards:
+        num_shards = min(num_shards, max_shards)
+
+    # Spread the events evenly so that no shard becomes the long tail of the campaign
+    num_shards = max(num_shards, 1)
+    return num_shards, math.ceil(total_events / num_shards)
+
+def profile_samples(ledger, job_states, schedd=""):
+    # Pair each finished job's wall time with the isotope and events recorded in the job ledger,
+    # only looking at the jobs of the schedd the states come from as job IDs of different schedds overlap
+    rows = {row["job_id"]: row for row in ledger.select(job_ids=list(job_states), schedd=schedd)}
+    samples = []
+    for job_id, state in job_states.items():
+        row = rows.get(job_id)
+        if row and state["status"] == "completed" and state.get("exit_code") == 0 and state.get("wall_seconds"):
+            # Thread-seconds, so the profile holds the throughput of a single thread
+            samples.append((row["isotope"] or row["kind"], row["num_events"], state["wall_seconds"] * (row.get("threads") or 1)))
+
+    return samples
@@ -0,0 +1,64 @@
+import os
+import re
+from .planner import profile_key, thread_memory_factor
+
+# Run summary GEANT4 prints at the end of /run/beamOn, e.g. " Number of events processed : 100000"
+# followed by the run timer " User=1234.5s Real=1240.2s Sys=3.1s"
+EVENTS_PROCESSED = re.compile(r"Number of events processed : (\d+)")
+RUN_TIMER = re.compile(r"User=([\d.]+)s Real=([\d.]+)s")
+
+# Warnings and errors GEANT4 writes to the error stream
+G4_EXCEPTION = "G4Exception"
+
+def scan_output(path):
+    # Stream the job output line by line, only the last run summary is kept
+    events = seconds = None
+    if not os.path.exists(path):
+        return events, seconds
+    with open(path, "r", errors="replace") as f:
+        for line in f:
+            processed = EVENTS_PROCESSED.search(line)
+            if processed:
+                events = int(processed.group(1))
+                continue
+            timer = RUN_TIMER.search(line)
+            if timer:
+                seconds = float(timer.group(2))
+
+    return events, seconds
+
+def count_exceptions(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path, "r", errors="replace") as f:
+        return sum(G4_EXCEPTION in line for line in f)
+
+def job_sample(job, log_state, output_folder):
+    # Events and run time from the job output, falling back on the ledger and the user log
+    name = job["name"]
+    output_folder = job.get("output_folder") or output_folder
+    events, seconds = scan_output(os.path.join(output_folder, f"{name}.out"))
+    events = events or job["num_events"]
+    seconds = log_state.get("wall_seconds") or seconds
+    if not seconds:
+        return None
+
+    # The profile holds single-threaded figures: thread-seconds, and the memory and cores of one thread
+    threads = job.get("threads") or 1
+    memory_mb = log_state.get("memory_mb")
+    cpus = log_state.get("cpus")
+
+    # The output only exists until it is merged
+    output_path = os.path.join(output_folder, job["output"] or f"{name}.root")
+    output_bytes = os.path.getsize(output_path) if os.path.exists(output_path) else None
+
+    return {
+        "key": profile_key(job["isotope"] or job["kind"], job["confine"]),
+        "events": events,
+        "seconds": seconds * threads,
+        "memory_mb": memory_mb / thread_memory_factor(threads) if memory_mb is not None else None,
+        "disk_kb": log_state.get("disk_kb"),
+        "cpus": cpus / threads if cpus is not None else None,
+        "output_bytes": output_bytes,
+        "exceptions": count_exceptions(os.path.join(output_folder, f"{name}.error")),
+    }
@@ -0,0 +1,121 @@
+import os
+import re
+import glob
+import struct
+import subprocess
+import concurrent.futures
+from .submission import schedd_args
+from .monitoring import job_constraint
+
+# Default size of a merged output file
+MERGE_BYTES = 2 * 1024 ** 3
+
+def transfer_cluster(schedd, cluster, job_ids):
+    # Fetch the spooled outputs of the given completed jobs of one cluster, then remove the ones staged out;
+    # other jobs of the cluster that completed meanwhile are left for the next run
+    constraint = f"({job_constraint(job_ids)}) && JobStatus == 4"
+    subprocess.run(["condor_transfer_data", *schedd_args(schedd), "-constraint", constraint], check=True, capture_output=True)
+    subprocess.run(["condor_rm", *schedd_args(schedd), "-constraint", f"{constraint} && StageOutFinish > 0"], check=True, capture_output=True)
+
+    return schedd, job_ids
+
+def retrieve_concurrently(jobs_by_schedd, max_workers=4):
+    # One transfer per cluster, a bounded number of them at a time so the schedds are not flooded
+    clusters = {}
+    for schedd, job_ids in jobs_by_schedd.items():
+        for job_id in job_ids:
+            clusters.setdefault((schedd, job_id.split(".")[0]), []).append(job_id)
+
+    retrieved = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(transfer_cluster, schedd, cluster, ids): cluster for (schedd, cluster), ids in clusters.items()}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                schedd, job_ids = future.result()
+                retrieved.setdefault(schedd, []).extend(job_ids)
+            except subprocess.CalledProcessError as e:
+                print(f"Error retrieving cluster {futures[future]}: {e}")
+
+    return retrieved
+
+def root_file_complete(path):
+    # A ROOT file starts with "root", its format version, fBEGIN and fEND; fEND is only
+    # written when the file is closed, so it matches the file size for complete files
+    try:
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            header = f.read(24)
+    except FileNotFoundError:
+        return False
+    if len(header) < 16 or header[:4] != b"root":
+        return False
+    version, = struct.unpack(">i", header[4:8])
+    if version >= 1000000:
+        if len(header) < 20:
+            return False
+        end, = struct.unpack(">q", header[12:20])
+    else:
+        end, = struct.unpack(">i", header[12:16])
+
+    return end == size
+
+def merged_name(merged_folder, group, number):
+    return os.path.join(merged_folder, f"{group}_merged_{number:04d}.root")
+
+def next_merge_number(merged_folder, group):
+    # Continue after the highest number of earlier runs, counting the files would reuse a number after a gap
+    pattern = re.compile(rf"{re.escape(group)}_merged_(\d+)\.root$")
+    paths = glob.glob(os.path.join(glob.escape(merged_folder), f"{glob.escape(group)}_merged_*.root"))
+    return max((int(match.group(1)) for match in map(pattern.search, paths) if match), default=-1) + 1
+
+def hadd(target, sources):
+    # Never overwrite a merged file, its inputs are already gone
+    if os.path.exists(target):
+        raise FileExistsError(f"{target} already exists")
+
+    # hadd streams the inputs into the target, it never holds them all in memory
+    subprocess.run(["hadd", "-k", target, *sources], check=True, capture_output=True)
+    return target
+
+def plan_merges(files, max_bytes, flush=False):
+    # Cut the files of one group into chunks of about max_bytes, the last partial chunk waits unless flushing
+    chunks, chunk, chunk_bytes = [], [], 0
+    for path in files:
+        chunk.append(path)
+        chunk_bytes += os.path.getsize(path)
+        if chunk_bytes >= max_bytes:
+            chunks.append(chunk)
+            chunk, chunk_bytes = [], 0
+    if chunk and flush:
+        chunks.append(chunk)
+
+    return chunks
+
+def merge_outputs(groups, merged_folder, max_bytes=MERGE_BYTES, max_workers=2, flush=False, keep_inputs=False):
+    # Merge every full chunk of every group as soon as it is planned, a few hadd at a time
+    os.makedirs(merged_folder, exist_ok=True)
+    merged = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for group, files in groups.items():
+            number = next_merge_number(merged_folder, group)
+            for chunk in plan_merges(files, max_bytes, flush):
+                futures[executor.submit(hadd, merged_name(merged_folder, group, number), chunk)] = chunk
+                number += 1
+
+        for future in concurrent.futures.as_completed(futures):
+            chunk = futures[future]
+            try:
+                target = future.result()
+            except (subprocess.CalledProcessError, FileExistsError) as e:
+                print(f"Error merging {len(chunk)} files: {e}")
+                continue
+            merged[target] = chunk
+            print(f"Merged {len(chunk)} files into {target}")
+
+            # The inputs are now part of the merged file
+            if not keep_inputs:
+                for path in chunk:
+                    os.remove(path)
+
+    return merged
@@ -0,0 +1,73 @@
+import json
+import fcntl
+import numpy as np
+from .timing import span
+
+# Seeds are kept in [1, 2**31 - 1] so both fit a signed 32-bit long and are never 0,
+# which would terminate the /random/setSeeds list
+SEED_BITS = 31
+SEED_MASK = (1 << SEED_BITS) - 1
+FEISTEL_ROUNDS = 4
+
+def new_campaign_seed():
+    # Fresh 128-bit entropy for a new campaign
+    return np.random.SeedSequence().entropy
+
+def feistel(keys, left, right):
+    # Keyed Feistel network over two 31-bit halves, a permutation of all pairs
+    for key in keys:
+        mixed = (right * np.uint64(0x9E3779B1) + key) & np.uint64(SEED_MASK)
+        mixed ^= mixed >> np.uint64(15)
+        mixed = (mixed * np.uint64(0x2C1B3C6D)) & np.uint64(SEED_MASK)
+        mixed ^= mixed >> np.uint64(12)
+        left, right = right, left ^ mixed
+    return left, right
+
+def derive_seeds(campaign_seed, job_indices):
+    # Round keys of the permutation are derived once from the campaign master seed
+    keys = np.random.SeedSequence(campaign_seed).generate_state(FEISTEL_ROUNDS, dtype=np.uint64)
+    keys = keys & np.uint64(SEED_MASK)
+
+    # Write each job index in base 2**31 - 1, so both halves are below SEED_MASK, and permute them.
+    # Pairs with a half equal to SEED_MASK go through the network again until they are below it too;
+    # that stays a permutation of those pairs, so different job indices can never share a seed pair.
+    indices = np.asarray(job_indices, dtype=np.uint64)
+    if np.any(indices >= np.uint64(SEED_MASK * SEED_MASK)):
+        raise ValueError(f"Job indices must be smaller than (2**{SEED_BITS} - 1)**2")
+    left, right = feistel(keys, indices // np.uint64(SEED_MASK), indices % np.uint64(SEED_MASK))
+    walk = (left == np.uint64(SEED_MASK)) | (right == np.uint64(SEED_MASK))
+    while np.any(walk):
+        left[walk], right[walk] = feistel(keys, left[walk], right[walk])
+        walk = (left == np.uint64(SEED_MASK)) | (right == np.uint64(SEED_MASK))
+
+    # Shift into [1, 2**31 - 1] and return one (seed1, seed2) row per job
+    return np.stack([left + np.uint64(1), right + np.uint64(1)], axis=1).astype(np.int64)
+
+def allocate_seeds(state_path, count, campaign_seed=None):
+    # Lock the campaign state file so concurrent submitters reserve disjoint job indices
+    with open(state_path, "a+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.seek(0)
+        content = f.read()
+        state = json.loads(content) if content else {}
+
+        # The first allocation fixes the campaign master seed
+        if "campaign_seed" not in state:
+            state["campaign_seed"] = campaign_seed if campaign_seed is not None else new_campaign_seed()
+            state["next_index"] = 0
+        elif campaign_seed is not None and campaign_seed != state["campaign_seed"]:
+            raise ValueError(f"Campaign seed {campaign_seed} does not match {state['campaign_seed']} stored in {state_path}")
+
+        # Reserve the next block of job indices
+        first_index = state["next_index"]
+        state["next_index"] = first_index + count
+        f.seek(0)
+        f.truncate()
+        json.dump(state, f)
+        f.flush()
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+    job_indices = np.arange(first_index, first_index + count)
+    with span("seeds"):
+        seeds = derive_seeds(state["campaign_seed"], job_indices)
+    return state["campaign_seed"], job_indices, seeds
@@ -0,0 +1,92 @@
+import os
+import hashlib
+import functools
+import numpy as np
+
+# Spectra shipped with the repository, one .npz (or .npy) per spectrum
+SPECTRA_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "spectra")
+
+# Spectrum used by the gamma background when none is given
+DEFAULT_SPECTRUM = "hall_c"
+
+# Spectra registered at run time, by name
+SPECTRA = {}
+
+def register_spectrum(name, path):
+    SPECTRA[name] = path
+
+def spectrum_path(spectrum):
+    # A registered name, a spectrum shipped in SPECTRA_FOLDER, or a path to a .npy/.npz file
+    if spectrum in SPECTRA:
+        return SPECTRA[spectrum]
+    for extension in (".npz", ".npy"):
+        path = os.path.join(SPECTRA_FOLDER, f"{spectrum}{extension}")
+        if os.path.exists(path):
+            return path
+    if os.path.exists(spectrum):
+        return spectrum
+    raise ValueError(f"Spectrum {spectrum} is neither registered nor found in {SPECTRA_FOLDER}.")
+
+@functools.lru_cache(maxsize=None)
+def load_spectrum(spectrum):
+    # Energies in MeV and rates in counts/keV/s, loaded once per process
+    path = spectrum_path(spectrum)
+    if path.endswith(".npz"):
+        with np.load(path) as table:
+            energy, rate = table["energy"], table["rate"]
+    else:
+        # A .npy holds a (2, n) or (n, 2) array of energies and rates
+        table = np.load(path)
+        energy, rate = table if table.shape[0] == 2 else table.T
+
+    # Shared through the cache, so they must not be modified in place
+    energy = np.array(energy, dtype=np.float64)
+    rate = np.array(rate, dtype=np.float64)
+    energy.flags.writeable = False
+    rate.flags.writeable = False
+    return energy, rate
+
+def save_spectrum(path, energy, rate):
+    np.savez(path, energy=np.asarray(energy, dtype=np.float64), rate=np.asarray(rate, dtype=np.float64))
+
+def bin_edges(energy):
+    # Points are bin centres, the edges are halfway between them and extrapolated at both ends
+    energy = np.asarray(energy, dtype=np.float64)
+    middle = (energy[1:] + energy[:-1]) / 2
+    return np.concatenate(([2 * energy[0] - middle[0]], middle, [2 * energy[-1] - middle[-1]]))
+
+def rebin_spectrum(energy, rate, new_energy):
+    # Integrate the rate over the old bins and spread it over the new ones, so the total rate is conserved
+    edges = bin_edges(energy)
+    cumulative = np.concatenate(([0], np.cumsum(rate * np.diff(edges))))
+    new_edges = bin_edges(new_energy)
+    return np.asarray(new_energy, dtype=np.float64), np.diff(np.interp(new_edges, edges, cumulative)) / np.diff(new_edges)
+
+def resample_spectrum(energy, rate, num_points):
+    # Evaluate the rate at evenly spaced energies over the same range
+    new_energy = np.linspace(energy[0], energy[-1], num_points)
+    return new_energy, np.interp(new_energy, energy, rate)
+
+def normalize_spectrum(energy, rate, total_rate=1.0):
+    # Scale the rate (per keV, energies in MeV) so that it integrates to total_rate
+    integral = np.sum(rate * np.diff(bin_edges(energy)) * 1e3)
+    return np.asarray(energy, dtype=np.float64), rate * (total_rate / integral)
+
+def spectrum_macro_content(energy, rate):
+    # One GPS histogram point per bin; repr keeps every digit of the stored values
+    return "".join(f"/gps/hist/point {e!r}   {r!r}\n" for e, r in zip(np.asarray(energy).tolist(), np.asarray(rate).tolist()))
+
+@functools.lru_cache(maxsize=None)
+def spectrum_macro(spectrum, folder):
+    # Emit each spectrum once as an include macro, named after its content so every variant gets its own file
+    content = spectrum_macro_content(*load_spectrum(spectrum))
+    path = os.path.join(folder, f"spectrum_{hashlib.sha256(content.encode()).hexdigest()[:16]}.mac")
+    if not os.path.exists(path):
+        os.makedirs(folder, exist_ok=True)
+        # Write under a temporary name first so concurrent submitters never see a partial spectrum
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w") as f:
+            f.write(content)
+        os.replace(temporary_path, path)
+
+    return path
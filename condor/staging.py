@@ -0,0 +1,108 @@
+import os
+import json
+import time
+import fcntl
+from .config import get_config
+from .bundle import walk_files
+from .submission import generate_condor_submit_batch, submit_condor_batch, record_batch
+from .planner import events_per_second, bytes_per_event
+
+# Manifest of a staging folder, listing every staged batch and whether it was submitted
+MANIFEST = "manifest.json"
+
+def path_bytes(paths):
+    # Size of every file below the given paths; paths that aren't local (e.g. bundle URLs) count as 0
+    return sum(os.path.getsize(path) for input_path in paths if os.path.exists(input_path) for path in walk_files(input_path))
+
+def estimate_jobs(jobs, profile, input_bundle=None, shared_macros=(), output_bytes_per_event=None, config=None, default_events_per_second=None):
+    # Every job gets the shared inputs and macros plus its own macro
+    shared_bytes = path_bytes([input_bundle] if input_bundle else get_config(config).input_files) + path_bytes(shared_macros)
+    input_bytes = shared_bytes * len(jobs) + path_bytes(job["macro"] for job in jobs)
+
+    # CPU time and output size from what was measured for each isotope and volume, or from the per-thread throughput
+    # given for unmeasured ones (a job of N threads runs N times faster on N cores, the CPU time stays the same);
+    # jobs without either are only counted
+    cpu_seconds = output_bytes = 0.0
+    unknown_throughput = unknown_output = 0
+    for job in jobs:
+        key, confine = job.get("isotope") or job["kind"], job.get("confine")
+        try:
+            cpu_seconds += job["num_events"] / events_per_second(profile, key, default_events_per_second, confine)
+        except ValueError:
+            unknown_throughput += 1
+        size = output_bytes_per_event or bytes_per_event(profile, key, confine)
+        if size is None:
+            unknown_output += 1
+        else:
+            output_bytes += job["num_events"] * size
+
+    return {
+        "jobs": len(jobs),
+        "events": sum(job["num_events"] for job in jobs),
+        "input_bytes": input_bytes,
+        "output_bytes": output_bytes if unknown_output < len(jobs) else None,
+        "cpu_hours": cpu_seconds / 3600,
+        "jobs_without_throughput": unknown_throughput,
+        "jobs_without_output_size": unknown_output,
+    }
+
+def format_estimates(estimates):
+    output = f"{estimates['output_bytes'] / 1e9:.2f} GB" if estimates["output_bytes"] is not None else "unknown"
+    report = f"{estimates['jobs']} jobs, {estimates['events']} events, inputs {estimates['input_bytes'] / 1e9:.2f} GB, outputs {output}, {estimates['cpu_hours']:.1f} CPU-hours"
+    if estimates["jobs_without_throughput"]:
+        report += f" (+{estimates['jobs_without_throughput']} jobs without a measured throughput)"
+    if estimates["output_bytes"] is not None and estimates["jobs_without_output_size"]:
+        report += f" (+{estimates['jobs_without_output_size']} jobs without a measured output size)"
+    return report
+
+def update_manifest(stage_folder, update):
+    # Lock the manifest so several stagers and a commit can share a staging folder
+    os.makedirs(stage_folder, exist_ok=True)
+    with open(os.path.join(stage_folder, MANIFEST), "a+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.seek(0)
+        content = f.read()
+        manifest = json.loads(content) if content else {"batches": []}
+
+        result = update(manifest)
+
+        f.seek(0)
+        f.truncate()
+        json.dump(manifest, f, indent=1)
+        f.flush()
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+    return result
+
+def stage_batch(stage_folder, batch_name, jobs, input_bundle=None, macros_folder=None, shared_macros=(), estimates=None, overlays=False, requests=None, config=None):
+    # The submit file and item list are written exactly as for a direct submission, just not submitted
+    generate_condor_submit_batch(stage_folder, batch_name, [job["name"] for job in jobs], input_bundle, macros_folder, shared_macros, requests, config)
+
+    # Jobs are only recorded in the job ledger when they are committed
+    batch = {"batch": batch_name, "staged": time.time(), "jobs": jobs, "estimates": estimates, "overlays": overlays, "cluster_id": None}
+    update_manifest(stage_folder, lambda manifest: manifest["batches"].append(batch))
+
+def commit_manifest(stage_folder, ledger):
+    def commit(manifest):
+        # Submit every batch that hasn't been yet, the manifest stays locked so no batch is submitted twice
+        submitted = 0
+        for batch in manifest["batches"]:
+            if batch["cluster_id"]:
+                continue
+            jobs = batch["jobs"]
+
+            # Condor puts the logs and outputs of the jobs in the staging folder, retrieve.py and profile_jobs.py look there
+            for job in jobs:
+                job["output_folder"] = os.path.abspath(stage_folder)
+            ledger.add_jobs(jobs)
+            cluster_id, job_ids = submit_condor_batch(stage_folder, batch["batch"])
+            record_batch(ledger, jobs, job_ids, batch["overlays"])
+
+            # A failed batch is recorded as submit_failed in the ledger, resubmit.py takes it from there
+            batch["cluster_id"] = cluster_id or "failed"
+            batch["committed"] = time.time()
+            submitted += len(job_ids)
+
+        return submitted
+
+    return update_manifest(stage_folder, commit)
@@ -0,0 +1,213 @@
+import os
+import subprocess
+from .timing import span
+from .config import get_config
+from .macros import remove_macros
+from .planner import resource_requests, job_configurations, split_by_threads
+
+def schedd_args(schedd):
+    # Empty for the local schedd
+    return ["-name", schedd] if schedd else []
+
+def condor_requests(requests):
+    # request_memory/request_disk/request_cpus lines, empty when nothing was measured
+    return "".join(f"\n{command} = {value}" for command, value in sorted((requests or {}).items()))
+
+def generate_condor_submit(submit_folder, isotope, confine, timestamp, requests=None, config=None):
+    # Ensure the submit folder exists
+    os.makedirs(submit_folder, exist_ok=True)
+    config = get_config(config)
+
+    # Define the content of the Condor submit file
+    submit_content = f"""
+universe   = vanilla
+executable = {config.executable}
+arguments  = {isotope}_{confine}_{timestamp}.mac
+
+log        = {isotope}_{confine}_{timestamp}.log
+output     = {isotope}_{confine}_{timestamp}.out
+error      = {isotope}_{confine}_{timestamp}.error
+
+getenv = True{condor_requests(requests)}
+transfer_input_files = {', '.join(config.input_files)}
+transfer_output_files  = {isotope}_{confine}_{timestamp}.root
+
+{config.submit_lines()}
+
+queue
+"""
+
+    # Write the submit content to a file
+    with span("submit_file", timestamp), open(os.path.join(submit_folder, f"{isotope}_{confine}_{timestamp}.submit"), "w") as f:
+        f.write(submit_content)
+
+def generate_condor_submit_gamma_background(submit_folder, timestamp, shared_macros=(), requests=None, config=None):
+    # Ensure the submit folder exists
+    os.makedirs(submit_folder, exist_ok=True)
+    config = get_config(config)
+
+    # Define the content of the Condor submit file for gamma background
+    submit_content = f"""
+universe   = vanilla
+executable = {config.executable}
+arguments  = {timestamp}.mac
+
+log        = gamma_background_{timestamp}.log
+output     = gamma_background_{timestamp}.out
+error      = gamma_background_{timestamp}.error
+
+getenv = True{condor_requests(requests)}
+transfer_input_files = {', '.join(config.input_files + [os.path.abspath(shared_macro) for shared_macro in shared_macros])}
+transfer_output_files  = gamma_background_{timestamp}.root
+
+{config.submit_lines()}
+
+queue
+"""
+
+    # Write the submit content to a file
+    with span("submit_file", timestamp), open(os.path.join(submit_folder, f"{timestamp}.submit"), "w") as f:
+        f.write(submit_content)
+
+def submit_condor_job(submit_folder, timestamp, isotope=None, confine=None):
+    # Construct the submit file name based on provided arguments
+    submit_file_name = f"{isotope}_" if isotope else ""
+    submit_file_name += f"{confine}_" if confine else ""
+    submit_file_name += f"{timestamp}.submit"
+    
+    # Path to the Condor submit file
+    submit_file = os.path.join(submit_folder, submit_file_name)
+
+    # Execute condor_submit command with spooling and capture output
+    try:
+        with span("submit", timestamp):
+            output = subprocess.check_output(["condor_submit", "-spool", "-terse", submit_file], text=True)
+        # Extract "<cluster>.<proc>" job ID from the output
+        with span("parse_job_id", timestamp):
+            _, job_ids = parse_terse_output(output)
+        job_id = job_ids[0]
+        print(f"Submitted job {job_id}")
+
+        # Delete the Condor submit file
+        os.remove(submit_file)
+
+        return job_id
+    except subprocess.CalledProcessError as e:
+        print(f"Error submitting job: {e}")
+        return None
+    
+def generate_condor_submit_batch(submit_folder, batch_name, job_names, input_bundle=None, macros_folder=None, shared_macros=(), requests=None, config=None):
+    # Ensure the submit folder exists
+    os.makedirs(submit_folder, exist_ok=True)
+    config = get_config(config)
+
+    # Ship one shared bundle instead of the individual inputs, the wrapper unpacks it on the worker
+    if input_bundle:
+        transfer_input_files = input_bundle
+        bundle_environment = f'\nenvironment = "CYGNO_INPUT_BUNDLE={os.path.basename(input_bundle)}"'
+    else:
+        transfer_input_files = ", ".join(config.input_files)
+        bundle_environment = ""
+
+    # Each job also gets its own macro
+    if macros_folder:
+        transfer_input_files += f", {os.path.abspath(macros_folder)}/$(name).mac"
+
+    # Bodies of the macro store, shared by all the overlays of the cluster
+    for shared_macro in shared_macros:
+        transfer_input_files += f", {os.path.abspath(shared_macro)}"
+
+    # Write one job name per line; condor_submit expands them into procs of a single cluster
+    item_file = f"{batch_name}.items"
+    with open(os.path.join(submit_folder, item_file), "w") as f:
+        f.write("\n".join(job_names) + "\n")
+
+    # Define the content of the Condor submit file, every per-job value comes from $(name)
+    submit_content = f"""
+universe   = vanilla
+executable = {config.executable}
+arguments  = $(name).mac
+
+log        = {batch_name}.log
+output     = $(name).out
+error      = $(name).error
+
+getenv = True{condor_requests(requests)}
+transfer_input_files = {transfer_input_files}{bundle_environment}
+transfer_output_files  = $(name).root
+
+{config.submit_lines()}
+
+queue name from {item_file}
+"""
+
+    # Write the submit content to a file
+    with span("submit_file", batch_name), open(os.path.join(submit_folder, f"{batch_name}.submit"), "w") as f:
+        f.write(submit_content)
+
+def parse_terse_output(output):
+    # condor_submit -terse prints one "<cluster>.<first proc> - <cluster>.<last proc>" line per cluster
+    cluster_id = None
+    job_ids = []
+    for line in output.splitlines():
+        if " - " not in line:
+            continue
+        first, last = (part.strip() for part in line.split(" - ", 1))
+        cluster, first_proc = first.split(".")
+        _, last_proc = last.split(".")
+        cluster_id = cluster
+        job_ids.extend(f"{cluster}.{proc}" for proc in range(int(first_proc), int(last_proc) + 1))
+
+    return cluster_id, job_ids
+
+def submit_condor_batch(submit_folder, batch_name, schedd=""):
+    # Path to the Condor submit file and its item list
+    submit_file = os.path.join(submit_folder, f"{batch_name}.submit")
+    item_file = os.path.join(submit_folder, f"{batch_name}.items")
+
+    # Submit the whole campaign with a single condor_submit call
+    try:
+        with span("submit", batch_name):
+            output = subprocess.check_output(["condor_submit", *schedd_args(schedd), "-spool", "-terse", f"{batch_name}.submit"], cwd=submit_folder, text=True)
+        with span("parse_job_id", batch_name):
+            cluster_id, job_ids = parse_terse_output(output)
+        print(f"Submitted cluster {cluster_id} with {len(job_ids)} jobs")
+
+        # Delete the Condor submit file and the item list
+        os.remove(submit_file)
+        os.remove(item_file)
+
+        return cluster_id, job_ids
+    except subprocess.CalledProcessError as e:
+        print(f"Error submitting cluster: {e}")
+        return None, []
+
+def record_batch(ledger, jobs, job_ids, overlays=False, schedd="", backoff=None, output_folder=None):
+    # Record every job with its proc ID, jobs past the returned IDs failed to be submitted;
+    # a resubmission (with a backoff) also counts the attempt and records where the new outputs land
+    names = [job["name"] for job in jobs]
+    if backoff is None:
+        ledger.mark_submitted(names, job_ids, schedd)
+    else:
+        ledger.mark_resubmitted(names, job_ids, backoff, output_folder, schedd)
+
+    # The spool holds a copy of every submitted overlay
+    if overlays:
+        remove_macros(jobs[:len(job_ids)])
+
+def submit_cluster(ledger, submit_folder, batch_name, jobs, input_bundle=None, macros_folder=None, shared_macros=(), requests=None, overlays=False, config=None, schedd="", backoff=None):
+    # Write the submit file of one cluster, submit it and record it, returns the cluster ID and job IDs
+    generate_condor_submit_batch(submit_folder, batch_name, [job["name"] for job in jobs], input_bundle, macros_folder, shared_macros, requests, config)
+    cluster_id, job_ids = submit_condor_batch(submit_folder, batch_name, schedd)
+    record_batch(ledger, jobs, job_ids, overlays, schedd, backoff, os.path.abspath(submit_folder))
+
+    return cluster_id, job_ids
+
+def submit_clusters(ledger, submit_folder, batch_prefix, jobs, profile, input_bundle=None, macros_folder=None, shared_macros=(), overlays=False, config=None):
+    # One cluster per number of threads, each one asking for what its most demanding configuration used
+    clusters = []
+    for group in split_by_threads(jobs):
+        requests = resource_requests(profile, job_configurations(group))
+        clusters.append(submit_cluster(ledger, submit_folder, f"{batch_prefix}_{group[0]['job_index']}", group, input_bundle, macros_folder, shared_macros, requests, overlays, config))
+
+    return clusters
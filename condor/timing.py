@@ -0,0 +1,86 @@
+import os
+import json
+import time
+import threading
+
+# Finished spans as (stage, job, start, end, thread), times in perf_counter nanoseconds.
+# list.append is atomic, so the macro writer threads can record into it without a lock.
+SPANS = []
+
+# Spans are only kept once a driver asks for them, so a long-lived Submitter or monitor --watch doesn't grow SPANS forever
+RECORDING = False
+
+class span:
+    # Time the enclosed block as one span of the given stage, optionally tagged with a job or batch name
+    __slots__ = ("stage", "job", "start")
+
+    def __init__(self, stage, job=None):
+        self.stage = stage
+        self.job = job
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        if RECORDING:
+            SPANS.append((self.stage, self.job, self.start, time.perf_counter_ns(), threading.get_ident()))
+
+def record_spans(enabled=True):
+    global RECORDING
+    RECORDING = enabled
+
+def reset_spans():
+    SPANS.clear()
+
+def timing_summary(spans=None):
+    # Durations of every stage in seconds, in the order the stages first ran
+    spans = SPANS if spans is None else spans
+    durations = {}
+    for stage, _, start, end, _ in spans:
+        durations.setdefault(stage, []).append(end - start)
+
+    # Every script records spans through the ledger, numpy is only loaded when a summary is asked for
+    import numpy as np
+    summary = {}
+    for stage, values in durations.items():
+        values = np.asarray(values) / 1e9
+        summary[stage] = {
+            "count": len(values),
+            "total": float(values.sum()),
+            "p50": float(np.percentile(values, 50)),
+            "p95": float(np.percentile(values, 95)),
+            "max": float(values.max()),
+        }
+
+    return summary
+
+def print_timing_summary(num_jobs, spans=None):
+    spans = SPANS if spans is None else spans
+    if not spans:
+        return
+
+    # Wall time from the first span started to the last one finished
+    wall = (max(span[3] for span in spans) - min(span[2] for span in spans)) / 1e9
+    print(f"{'stage':<14}{'count':>8}{'total s':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for stage, stats in timing_summary(spans).items():
+        print(f"{stage:<14}{stats['count']:>8}{stats['total']:>10.3f}{stats['p50'] * 1e3:>10.3f}{stats['p95'] * 1e3:>10.3f}{stats['max'] * 1e3:>10.3f}")
+    print(f"{num_jobs} jobs in {wall:.3f} s ({num_jobs / wall if wall else 0:.1f} jobs/s)")
+
+def write_trace(path, spans=None):
+    # Chrome trace event format, opens in chrome://tracing, Perfetto or speedscope
+    spans = SPANS if spans is None else spans
+    pid = os.getpid()
+    events = [
+        {"name": stage if job is None else f"{stage} {job}", "cat": stage, "ph": "X", "ts": start / 1e3, "dur": (end - start) / 1e3, "pid": pid, "tid": thread}
+        for stage, job, start, end, thread in spans
+    ]
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+def report_timing(num_jobs, trace_path=None):
+    # End-of-run report of the drivers
+    print_timing_summary(num_jobs)
+    if trace_path:
+        write_trace(trace_path)
+        print(f"Timing trace written to {trace_path}")
@@ -0,0 +1,179 @@
+import os
+import re
+import json
+from datetime import datetime
+
+# Header line of every event in a Condor user log, e.g. "005 (1234.000.000) 2024-05-01 12:00:00 Job terminated."
+EVENT_HEADER = re.compile(r"^(\d{3}) \((\d+)\.(\d+)\.\d+\) (\S+ \S+) (.*)$")
+
+# Every event ends with this line
+EVENT_END = b"...\n"
+
+# Job state after each event code, events not listed here don't change the state
+EVENT_STATUS = {
+    "000": "idle",        # submitted
+    "001": "running",     # executing
+    "004": "idle",        # evicted, goes back to the queue
+    "005": "completed",   # terminated
+    "009": "removed",     # aborted
+    "012": "held",
+    "013": "idle",        # released
+}
+
+# Termination details of event 005
+NORMAL_TERMINATION = re.compile(r"Normal termination \(return value (-?\d+)\)")
+ABNORMAL_TERMINATION = re.compile(r"Abnormal termination \(signal (\d+)\)")
+
+# Resource usage lines of event 005, e.g. "Usr 0 00:29:00, Sys 0 00:00:10  -  Run Remote Usage"
+REMOTE_USAGE = re.compile(r"Usr (\d+) (\d+):(\d+):(\d+), Sys (\d+) (\d+):(\d+):(\d+)\s+-\s+Run Remote Usage")
+
+# Partitionable resources table of event 005, e.g. "Memory (MB)          :      512      1024      1024",
+# the first value is the usage, followed by the request and the allocation
+RESOURCE_USAGE = re.compile(r"^(Cpus|Disk \(KB\)|Memory \(MB\))\s*:\s*([\d.]+)")
+RESOURCE_FIELDS = {"Cpus": "cpus", "Disk (KB)": "disk_kb", "Memory (MB)": "memory_mb"}
+
+# Memory line of event 006 (image size updated), e.g. "12  -  MemoryUsage of job (MB)"
+MEMORY_UPDATE = re.compile(r"^(\d+)\s+-\s+MemoryUsage of job \(MB\)")
+
+def parse_event_time(event_time):
+    # Recent Condor versions log ISO dates, older ones "MM/DD HH:MM:SS" without the year
+    try:
+        return datetime.strptime(event_time, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return datetime.strptime(event_time, "%m/%d %H:%M:%S").replace(year=datetime.now().year)
+
+def parse_events(text):
+    # Split a chunk of complete events into (code, job_id, time, lines) tuples
+    events = []
+    for block in text.split("...\n"):
+        lines = block.strip("\n").splitlines()
+        if not lines:
+            continue
+        match = EVENT_HEADER.match(lines[0])
+        if not match:
+            continue
+        code, cluster, proc, event_time, _ = match.groups()
+        events.append((code, f"{int(cluster)}.{int(proc)}", event_time, [line.strip() for line in lines[1:]]))
+
+    return events
+
+class UserLogWatcher:
+    def __init__(self, log_files=(), on_finished=None):
+        # Read offset per user log and the current state of every job seen in them
+        self.offsets = {}
+        self.jobs = {}
+        self.on_finished = on_finished
+        for log_file in log_files:
+            self.add(log_file)
+
+    def add(self, log_file):
+        self.offsets.setdefault(log_file, 0)
+
+    def read_new_events(self, log_file):
+        # Only the bytes appended since the last poll are read
+        try:
+            size = os.path.getsize(log_file)
+        except FileNotFoundError:
+            return []
+
+        # A log that shrank has been rotated or rewritten, start over
+        offset = self.offsets[log_file]
+        if size < offset:
+            offset = 0
+        if size == offset:
+            return []
+
+        with open(log_file, "rb") as f:
+            f.seek(offset)
+            chunk = f.read(size - offset)
+
+        # Leave an event that is still being written for the next poll
+        end = chunk.rfind(EVENT_END)
+        if end < 0:
+            return []
+        end += len(EVENT_END)
+        self.offsets[log_file] = offset + end
+
+        return parse_events(chunk[:end].decode(errors="replace"))
+
+    def apply(self, code, job_id, event_time, lines):
+        # Image size updates don't change the state, only the memory peak of the job
+        if code == "006":
+            for line in lines:
+                memory = MEMORY_UPDATE.match(line)
+                if memory:
+                    job = self.jobs.setdefault(job_id, {"status": None, "exit_code": None, "hold_reason": None})
+                    job["memory_mb"] = max(job.get("memory_mb", 0), int(memory.group(1)))
+            return False
+
+        status = EVENT_STATUS.get(code)
+        if status is None:
+            return False
+
+        job = self.jobs.setdefault(job_id, {"status": None, "exit_code": None, "hold_reason": None})
+        job["status"] = status
+        job["time"] = event_time
+
+        # Remember when the job started running to know its wall time when it terminates
+        if code == "001":
+            job["started"] = event_time
+
+        # Keep the exit code of terminated jobs, a signal counts as a failure
+        if code == "005":
+            for line in lines:
+                normal = NORMAL_TERMINATION.search(line)
+                abnormal = ABNORMAL_TERMINATION.search(line)
+                if normal:
+                    job["exit_code"] = int(normal.group(1))
+                    break
+                if abnormal:
+                    job["exit_code"] = 128 + int(abnormal.group(1))
+                    break
+            for line in lines:
+                usage = REMOTE_USAGE.search(line)
+                if usage:
+                    days, hours, minutes, seconds = (int(value) for value in usage.groups()[:4])
+                    job["cpu_seconds"] = ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+                    break
+            for line in lines:
+                resource = RESOURCE_USAGE.match(line)
+                if resource:
+                    field = RESOURCE_FIELDS[resource.group(1)]
+                    job[field] = max(job.get(field, 0), float(resource.group(2)))
+            if job.get("started"):
+                job["wall_seconds"] = (parse_event_time(event_time) - parse_event_time(job["started"])).total_seconds()
+
+        # The first line of a held event is the hold reason
+        if code == "012":
+            job["hold_reason"] = lines[0] if lines else None
+        if code == "004":
+            job["evictions"] = job.get("evictions", 0) + 1
+
+        return code in ("005", "009", "012")
+
+    def poll(self):
+        # Process the new events of every log, the cost only depends on how much was appended
+        ended = []
+        for log_file in self.offsets:
+            for code, job_id, event_time, lines in self.read_new_events(log_file):
+                if self.apply(code, job_id, event_time, lines):
+                    ended.append(job_id)
+
+        # Hand all the jobs that ended in this poll over at once
+        if ended and self.on_finished:
+            self.on_finished(ended)
+
+        return ended
+
+    def save_state(self, path):
+        with open(path, "w") as f:
+            json.dump({"offsets": self.offsets, "jobs": self.jobs}, f)
+
+    def load_state(self, path):
+        # A missing state file just means nothing was read yet
+        if not os.path.exists(path):
+            return
+        with open(path, "r") as f:
+            state = json.load(f)
+        self.offsets.update(state["offsets"])
+        self.jobs.update(state["jobs"])
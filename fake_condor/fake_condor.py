@@ -0,0 +1,137 @@
+import os
+import re
+import sys
+import json
+import time
+import fcntl
+import random
+
+# Behaviour of the fake pool, set through the environment
+LATENCY = float(os.environ.get("FAKE_CONDOR_LATENCY", "0"))
+FAILURE_RATE = float(os.environ.get("FAKE_CONDOR_FAILURE_RATE", "0"))
+COMPLETED_FRACTION = float(os.environ.get("FAKE_CONDOR_COMPLETED", "1"))
+STATE_FOLDER = os.environ.get("FAKE_CONDOR_STATE", os.path.join(os.environ.get("TMPDIR", "/tmp"), "fake_condor"))
+
+# Queue statements understood by condor_submit
+QUEUE_FROM = re.compile(r"^queue\s+\w+\s+from\s+(\S+)\s*$", re.MULTILINE)
+QUEUE_COUNT = re.compile(r"^queue\s*(\d*)\s*$", re.MULTILINE)
+
+# Schedd named with -name, every schedd has its own queue with its own cluster IDs
+SCHEDD = None
+
+class State:
+    # The whole queue of a schedd lives in one JSON file, locked while a command runs
+    def __enter__(self):
+        os.makedirs(STATE_FOLDER, exist_ok=True)
+        self.file = open(os.path.join(STATE_FOLDER, f"queue_{SCHEDD}.json" if SCHEDD else "queue.json"), "a+")
+        fcntl.flock(self.file, fcntl.LOCK_EX)
+        self.file.seek(0)
+        content = self.file.read()
+        self.data = json.loads(content) if content else {"next_cluster": 1, "queue": {}, "history": {}}
+        return self.data
+
+    def __exit__(self, *exc):
+        self.file.seek(0)
+        self.file.truncate()
+        json.dump(self.data, self.file)
+        self.file.close()
+
+class Attributes(dict):
+    # Attributes of a job ad, a missing or undefined one compares false like UNDEFINED in a ClassAd expression
+    def __missing__(self, name):
+        return float("nan")
+
+def matches(ad, constraint):
+    # The constraints the scripts send (==, >, &&, || and parentheses) read as Python once && and || are spelled out
+    if not constraint:
+        return True
+    attributes = Attributes({name: value for name, value in ad.items() if value is not None})
+    return bool(eval(constraint.replace("&&", " and ").replace("||", " or "), {"__builtins__": {}}, attributes))
+
+def option(args, name):
+    return args[args.index(name) + 1] if name in args else None
+
+def condor_submit(args):
+    # The submit file is the last argument, "from" item files are relative to the working directory
+    with open(args[-1], "r") as f:
+        description = f.read()
+    queue_from = QUEUE_FROM.search(description)
+    if queue_from:
+        with open(queue_from.group(1), "r") as f:
+            count = sum(1 for line in f if line.strip())
+    else:
+        count = int(QUEUE_COUNT.search(description).group(1) or 1)
+
+    with State() as state:
+        cluster = state["next_cluster"]
+        state["next_cluster"] += 1
+        for proc in range(count):
+            status = 4 if random.random() < COMPLETED_FRACTION else 2
+            state["queue"][f"{cluster}.{proc}"] = {"ClusterId": cluster, "ProcId": proc, "JobStatus": status, "ExitCode": 0 if status == 4 else None}
+
+    if "-terse" in args:
+        print(f"{cluster}.0 - {cluster}.{count - 1}")
+    else:
+        print(f"Submitting job(s).\n{count} job(s) submitted to cluster {cluster}.")
+
+def condor_q(args, key="queue"):
+    constraint = option(args, "-constraint")
+    with State() as state:
+        ads = [ad for ad in state[key].values() if matches(ad, constraint)]
+    if ads:
+        print(json.dumps(ads))
+
+def condor_history(args):
+    condor_q(args, "history")
+
+def condor_transfer_data(args):
+    # Like the real one, only the completed jobs matching the constraint have outputs to stage out
+    constraint = option(args, "-constraint")
+    with State() as state:
+        for ad in state["queue"].values():
+            if matches(ad, constraint) and ad["JobStatus"] == 4:
+                ad["StageOutFinish"] = int(time.time())
+
+def condor_rm(args):
+    constraint = option(args, "-constraint")
+    with State() as state:
+        if constraint:
+            job_ids = [job_id for job_id, ad in state["queue"].items() if matches(ad, constraint)]
+            missing = not job_ids
+        else:
+            requested = [arg for arg in args if not arg.startswith("-") and arg != option(args, "-name")]
+            job_ids = [job_id for job_id in requested if job_id in state["queue"]]
+            missing = len(job_ids) < len(requested)
+        for job_id in job_ids:
+            ad = state["queue"].pop(job_id)
+            ad["JobStatus"] = 4 if "StageOutFinish" in ad else 3
+            state["history"][job_id] = ad
+
+    # The real condor_rm fails when a job or the constraint matches nothing in the queue
+    if missing:
+        print(f"Couldn't find/remove all jobs matching {constraint or 'the given job IDs'}", file=sys.stderr)
+        sys.exit(1)
+
+COMMANDS = {
+    "condor_submit": condor_submit,
+    "condor_q": condor_q,
+    "condor_history": condor_history,
+    "condor_transfer_data": condor_transfer_data,
+    "condor_rm": condor_rm,
+}
+
+def main():
+    global SCHEDD
+    command, args = sys.argv[1], sys.argv[2:]
+    SCHEDD = option(args, "-name")
+
+    # Every command pays the configured schedd latency and may fail
+    time.sleep(LATENCY)
+    if random.random() < FAILURE_RATE:
+        print(f"ERROR: {command} failed (fake failure)", file=sys.stderr)
+        sys.exit(1)
+
+    COMMANDS[command](args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import argparse
+import glob
+import time
+import subprocess
+from condor import check_jobs, retrieve_completed
+from condor.ledger import JobLedger, FINAL_STATUSES
+from condor.userlog import UserLogWatcher
+from condor.planner import load_profile, save_profile, update_profile, profile_samples
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Check the submitted Condor jobs and retrieve the finished ones.")
+    parser.add_argument("log_files", nargs="*", help="Condor user logs to follow with --watch (default: every *.log).")
+    parser.add_argument("--ledger", default="jobs.sqlite", help="Job ledger recording every job and its state.")
+    parser.add_argument("--campaign", help="Only look at the jobs of this campaign.")
+    parser.add_argument("--events", metavar="ISOTOPE", help="Print how many events of this isotope are done (optionally in --confine) and exit.")
+    parser.add_argument("--confine", help="Confinement volume for --events.")
+    parser.add_argument("--watch", action="store_true", help="Follow the Condor user logs and retrieve each job's output as soon as it ends.")
+    parser.add_argument("--schedd", default="", help="Schedd the jobs of the watched user logs were submitted to (default: the local one).")
+    parser.add_argument("--interval", type=float, default=30, help="Seconds between two reads of the user logs.")
+    parser.add_argument("--profile", default="throughput_profile.json", help="Throughput profile updated with every job that finishes.")
+    parser.add_argument("--state", default="userlog_state.json", help="File keeping the read offsets and job states between runs.")
+    return parser.parse_args()
+
+def watch(ledger, log_files, interval, state_path, profile_path, schedd=""):
+    profile = load_profile(profile_path)
+
+    def on_finished(job_ids):
+        # Only jobs the ledger still tracks, a replayed log also holds jobs that were retrieved or merged long ago
+        active = {row["job_id"] for row in ledger.select(job_ids=job_ids, schedd=schedd) if row["status"] not in FINAL_STATUSES}
+        states = {job_id: watcher.jobs[job_id] for job_id in job_ids if job_id in active}
+        if not states:
+            return
+
+        # Record the new states in the job ledger, job IDs are only unique within a schedd
+        ledger.update_states(states, schedd)
+
+        # Retrieve the jobs that ended normally, held and removed jobs have nothing to retrieve
+        completed = [job_id for job_id, job in states.items() if job["status"] == "completed"]
+        if completed:
+            try:
+                retrieve_completed(completed, schedd)
+                ledger.update_states({job_id: dict(states[job_id], status="retrieved") for job_id in completed}, schedd)
+                print(f"Retrieved the output of {len(completed)} finished jobs.")
+            except subprocess.CalledProcessError as e:
+                # They stay completed, retrieve.py picks them up later
+                print(f"Error retrieving {len(completed)} finished jobs: {e}")
+        for job_id, job in states.items():
+            if job["status"] == "held":
+                print(f"Job {job_id} is held: {job['hold_reason']}")
+            elif job["exit_code"]:
+                print(f"Job {job_id} exited with code {job['exit_code']}.")
+
+        # Feed the measured throughput back to the shard planner
+        samples = profile_samples(ledger, states, schedd)
+        if samples:
+            save_profile(update_profile(profile, samples), profile_path)
+
+    # Resume from the offsets of the previous run
+    watcher = UserLogWatcher(log_files, on_finished=on_finished)
+    watcher.load_state(state_path)
+
+    # Only the events appended since the last read are parsed
+    while True:
+        watcher.poll()
+        watcher.save_state(state_path)
+
+        # Stop once every job seen has left the queue
+        active = sum(job["status"] in ("idle", "running") for job in watcher.jobs.values())
+        if watcher.jobs and not active:
+            print("All jobs have ended.")
+            return
+        print(f"{active} jobs still idle or running.")
+        time.sleep(interval)
+
+def main():
+    # Parse command-line arguments
+    args = parse_arguments()
+    ledger = JobLedger(args.ledger)
+
+    # Answer from the ledger indexes without asking the schedd
+    if args.events:
+        where = f" in {args.confine}" if args.confine else ""
+        print(f"{ledger.events_done(args.events, args.confine)} events of {args.events}{where} done.")
+
+    # Follow the Condor user logs instead of querying the schedd
+    elif args.watch:
+        watch(ledger, args.log_files or sorted(glob.glob("*.log")), args.interval, args.state, args.profile, args.schedd)
+
+    # Check every active job of the ledger with a single query
+    else:
+        check_jobs(ledger, args.campaign)
+
+    ledger.close()
+
+# Execute the main function if the script is run directly
+if __name__ == "__main__":
+    main()
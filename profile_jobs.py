@@ -0,0 +1,56 @@
+import argparse
+import glob
+from condor.ledger import JobLedger
+from condor.userlog import UserLogWatcher
+from condor.profiler import job_sample
+from condor.planner import load_profile, save_profile, update_resources, bytes_per_event
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Build the per-isotope/per-volume resource profile from the logs of finished jobs.")
+    parser.add_argument("log_files", nargs="*", help="Condor user logs of the submitted clusters (default: every *.log).")
+    parser.add_argument("--ledger", default="jobs.sqlite", help="Job ledger recording every job and its state.")
+    parser.add_argument("--campaign", help="Only profile the jobs of this campaign.")
+    parser.add_argument("--schedd", default="", help="Schedd the jobs of the user logs were submitted to (default: the local one).")
+    parser.add_argument("--output_folder", default=".", help="Folder holding the retrieved .out, .error and .root files.")
+    parser.add_argument("--profile", default="throughput_profile.json", help="Profile the submitters read their job sizes and resource requests from.")
+    parser.add_argument("--state", default="profiler_state.json", help="File keeping the user log read offsets between runs.")
+    return parser.parse_args()
+
+def main():
+    # Parse command-line arguments
+    args = parse_arguments()
+    ledger = JobLedger(args.ledger)
+
+    # Only the user log events appended since the previous run are parsed
+    watcher = UserLogWatcher(args.log_files or sorted(glob.glob("*.log")))
+    watcher.load_state(args.state)
+    watcher.poll()
+    watcher.save_state(args.state)
+
+    # Each successful job is scanned once, jobs whose logs aren't there yet are left for the next run.
+    # Job IDs are only unique within a schedd, so only the jobs of the schedd the logs come from are matched.
+    samples, profiled = [], []
+    for job in ledger.unprofiled(args.campaign):
+        if (job["schedd"] or "") != args.schedd:
+            continue
+        sample = job_sample(job, watcher.jobs.get(job["job_id"], {}), args.output_folder)
+        if sample:
+            samples.append(sample)
+            profiled.append(job["name"])
+
+    # Fold the new jobs into the profile
+    profile = update_resources(load_profile(args.profile), samples)
+    save_profile(profile, args.profile)
+    ledger.mark_profiled(profiled)
+    ledger.close()
+
+    print(f"Profiled {len(profiled)} jobs.")
+    for key in sorted({sample["key"] for sample in samples}):
+        entry = profile[key]
+        size = bytes_per_event(profile, key)
+        size = f"{size:.0f} bytes/event" if size is not None else "output size unknown"
+        print(f"{key}: {entry['events'] / entry['seconds']:.1f} events/s, peak memory {entry.get('memory_mb', 0):.0f} MB, {size} ({entry['jobs']} jobs)")
+
+# Execute the main function if the script is run directly
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import argparse
+from condor import resubmit_jobs, shared_input_bundle, load_nuclide_table
+from condor.ledger import JobLedger
+from condor.planner import load_profile
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Resubmit failed, held and non-zero exit code jobs with their original seeds.")
+    parser.add_argument("--ledger", default="jobs.sqlite", help="Job ledger recording every job and its state.")
+    parser.add_argument("--campaign", help="Only resubmit the jobs of this campaign.")
+    parser.add_argument("--max_attempts", type=int, default=3, help="Number of times a job may be resubmitted.")
+    parser.add_argument("--backoff", type=float, default=600, help="Seconds to wait before the first retry, doubled after every attempt.")
+    parser.add_argument("--profile", default="throughput_profile.json", help="Resource usage measured from finished jobs, for the memory, disk and core requests.")
+    parser.add_argument("--nuclide_table", default="nuclide_table.json", help="On-disk cache of the isotope properties.")
+    parser.add_argument("--bundle_folder", help="Ship the inputs as one content-hashed bundle built in this folder.")
+    parser.add_argument("--bundle_url", help="Base URL the bundle folder is served from, workers then fetch the bundle through it.")
+    parser.add_argument("--macro_store", help="Macro store the campaign was submitted with, the overlays are rendered again from it.")
+    return parser.parse_args()
+
+def main():
+    # Parse command-line arguments
+    args = parse_arguments()
+    ledger = JobLedger(args.ledger)
+    load_nuclide_table(args.nuclide_table)
+
+    # Define the submit folder
+    submit_folder = "."
+
+    # Failed jobs whose backoff has expired and that have retries left
+    jobs = ledger.retry_candidates(args.max_attempts, campaign=args.campaign)
+    if jobs:
+        resubmit_jobs(ledger, jobs, submit_folder, args.backoff, shared_input_bundle(args), args.macro_store, profile=load_profile(args.profile))
+    else:
+        print("No jobs to resubmit.")
+
+    # Report the jobs that need a closer look
+    exhausted = ledger.exhausted(args.max_attempts, campaign=args.campaign)
+    for job in exhausted:
+        print(f"Job {job['name']} failed {job['attempts']} times, giving up ({job['status']}, exit code {job['exit_code']}).")
+
+    ledger.close()
+
+# Execute the main function if the script is run directly
+if __name__ == "__main__":
+    main()
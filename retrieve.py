@@ -0,0 +1,67 @@
+import os
+import argparse
+from condor.ledger import JobLedger
+from condor.retrieval import retrieve_concurrently, root_file_complete, merge_outputs, MERGE_BYTES
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Retrieve the outputs of the completed jobs, check them and merge them.")
+    parser.add_argument("--ledger", default="jobs.sqlite", help="Job ledger recording every job and its state.")
+    parser.add_argument("--campaign", help="Only retrieve the jobs of this campaign.")
+    parser.add_argument("--output_folder", default=".", help="Folder the job outputs are transferred to.")
+    parser.add_argument("--merged_folder", default="merged", help="Folder for the merged outputs.")
+    parser.add_argument("--group_by", choices=["campaign", "isotope"], default="isotope", help="One series of merged files per campaign or per isotope.")
+    parser.add_argument("--merge_size", type=float, default=MERGE_BYTES / 1024 ** 3, help="Size of each merged file in GB.")
+    parser.add_argument("--transfer_workers", type=int, default=4, help="Clusters transferred at the same time.")
+    parser.add_argument("--merge_workers", type=int, default=2, help="hadd processes run at the same time.")
+    parser.add_argument("--flush", action="store_true", help="Also merge the last, smaller than --merge_size, chunk of every group.")
+    parser.add_argument("--keep_inputs", action="store_true", help="Keep the job outputs after merging them.")
+    return parser.parse_args()
+
+def main():
+    # Parse command-line arguments
+    args = parse_arguments()
+    ledger = JobLedger(args.ledger)
+
+    # Fetch the outputs of every completed job, a few clusters at a time
+    completed = {}
+    for job in ledger.select(campaign=args.campaign, statuses=["completed"]):
+        completed.setdefault(job["schedd"] or "", {})[job["job_id"]] = job
+    if completed:
+        retrieved = retrieve_concurrently({schedd: list(jobs) for schedd, jobs in completed.items()}, args.transfer_workers)
+        for schedd, job_ids in retrieved.items():
+            ledger.update_states({job_id: {"status": "retrieved", "exit_code": completed[schedd][job_id]["exit_code"]} for job_id in job_ids}, schedd)
+        print(f"Retrieved {sum(map(len, retrieved.values()))} of {sum(map(len, completed.values()))} completed jobs.")
+
+    # Check that every retrieved output is there and was closed properly
+    groups = {}
+    bad = []
+    for job in ledger.select(campaign=args.campaign, statuses=["retrieved"]):
+        # Staged and resubmitted jobs record where Condor put their outputs
+        path = os.path.join(job["output_folder"] or args.output_folder, job["output"])
+        # Jobs with a non-zero exit code are left to resubmit.py
+        if job["exit_code"] not in (0, None):
+            continue
+        if root_file_complete(path):
+            groups.setdefault(job[args.group_by] or job["kind"], []).append((path, job["name"]))
+        else:
+            bad.append(job["name"])
+    if bad:
+        ledger.set_status(bad, "bad_output")
+        print(f"{len(bad)} outputs are missing or incomplete, they can be resubmitted with resubmit.py.")
+
+    # Merge the good outputs into files of about --merge_size
+    names = {path: name for files in groups.values() for path, name in files}
+    merged = merge_outputs(
+        {group: [path for path, _ in files] for group, files in groups.items()},
+        args.merged_folder,
+        int(args.merge_size * 1024 ** 3),
+        args.merge_workers,
+        args.flush,
+        args.keep_inputs,
+    )
+    ledger.set_status([names[path] for chunk in merged.values() for path in chunk], "merged")
+    ledger.close()
+
+# Execute the main function if the script is run directly
+if __name__ == "__main__":
+    main()
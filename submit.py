@@ -1,66 +1,159 @@
 import time
 import os
 import argparse
-from condor import generate_geant4_macros, generate_seeds, generate_condor_submit, submit_condor_job
+from condor.ledger import JobLedger
+from condor.staging import estimate_jobs, format_estimates, stage_batch
+from condor.timing import record_spans, report_timing
+from condor.planner import load_profile, events_per_second, plan_shards, resource_requests
+from condor import generate_geant4_macros, generate_geant4_macros_batch, allocate_seeds, generate_condor_submit, submit_condor_job, submit_cluster, shared_input_bundle, describe_jobs, render_overlays, write_macros, load_nuclide_table, save_nuclide_table
 
 def parse_arguments():
     parser = argparse.ArgumentParser(description="Generate GEANT4 macros.")
-    parser.add_argument("--macros_folder", required=True, help="Path to the folder to save the generated macros.")
+    parser.add_argument("--macros_folder", help="Path to the folder to save the generated macros (with --stage they are kept in the staging folder).")
     parser.add_argument("--isotope", required=True, help="Isotope name.")
     parser.add_argument("--position", required=True, help="Position string.")
     parser.add_argument("--confine", required=True, help="Confinement name.")
-    parser.add_argument("--num_events", type=int, required=True, help="Number of events.")
+    parser.add_argument("--num_events", type=int, help="Number of events.")
+    parser.add_argument("--threads", type=int, default=1, help="Worker threads of each GEANT4 job, Condor is asked for as many cores.")
     parser.add_argument("--times", type=int, default=1, help="Number of times to submit the macro.")
-    return parser.parse_args()
+    parser.add_argument("--total_events", type=int, help="Total number of events, split into shards instead of giving --num_events and --times.")
+    parser.add_argument("--job_seconds", type=float, default=4 * 3600, help="Target wall time of each shard in seconds.")
+    parser.add_argument("--events_per_second", type=float, help="Throughput to assume until one has been measured.")
+    parser.add_argument("--profile", default="throughput_profile.json", help="Throughput and resource usage measured from finished jobs.")
+    parser.add_argument("--batch", action="store_true", help="Submit all macros as a single Condor cluster.")
+    parser.add_argument("--bundle_folder", help="Ship the inputs as one content-hashed bundle built in this folder (batch mode only).")
+    parser.add_argument("--bundle_url", help="Base URL the bundle folder is served from, workers then fetch the bundle through it.")
+    parser.add_argument("--macro_store", help="Keep one content-hashed macro body per configuration in this folder, each job only gets a small overlay macro (batch mode only).")
+    parser.add_argument("--seed_state", default="campaign_seeds.json", help="File holding the campaign master seed and the next free job index.")
+    parser.add_argument("--campaign_seed", type=int, help="Campaign master seed, only used when the seed state file is new.")
+    parser.add_argument("--nuclide_table", default="nuclide_table.json", help="On-disk cache of the isotope properties.")
+    parser.add_argument("--stage", help="Only render the macros (into <stage>/macros) and submit file into this staging folder and add them to its manifest, commit_staged.py submits them later.")
+    parser.add_argument("--bytes_per_event", type=float, help="Output size per event for the estimates of a staged batch, instead of the measured one.")
+    parser.add_argument("--ledger", default="jobs.sqlite", help="Job ledger recording every job and its state.")
+    parser.add_argument("--campaign", help="Campaign name in the job ledger (default: <isotope>_<confine>).")
+    parser.add_argument("--trace", help="Also write the timing spans of the run to this Chrome trace file (chrome://tracing, Perfetto).")
+    args = parser.parse_args()
+    if (args.num_events is None) == (args.total_events is None):
+        parser.error("give exactly one of --num_events or --total_events")
+    if args.stage:
+        # A staged batch is self-contained, its macros live next to its submit file
+        if args.macros_folder:
+            parser.error("--stage keeps the macros in the staging folder, leave out --macros_folder")
+        args.macros_folder = os.path.join(args.stage, "macros")
+    elif not args.macros_folder:
+        parser.error("--macros_folder is required unless --stage is given")
+    if args.macro_store and not (args.batch or args.stage):
+        parser.error("--macro_store needs --batch or --stage")
+    if (args.bundle_folder or args.bundle_url) and not (args.batch or args.stage):
+        parser.error("--bundle_folder and --bundle_url need --batch or --stage")
+    return args
+
+def submit_batch(args, submit_folder, ledger, timestamp, jobs, requests):
+    # Render and write all macros in one batch, or only the per-job overlays of the macro store
+    shared_macros = []
+    if args.macro_store:
+        macros, shared_macros = render_overlays(jobs, args.macro_store)
+        write_macros(args.macros_folder, macros)
+    else:
+        seeds = [(job["seed1"], job["seed2"]) for job in jobs]
+        job_timestamps = [f"{timestamp}_{job['job_index']}" for job in jobs]
+        generate_geant4_macros_batch(args.macros_folder, args.isotope, args.position, args.confine, seeds, args.num_events, job_timestamps, args.threads)
+    batch_name = f"{args.isotope}_{args.confine}_{timestamp}_{jobs[0]['job_index']}"
+    input_bundle = shared_input_bundle(args)
+
+    # Stage the batch with its estimates instead of submitting it
+    if args.stage:
+        estimates = estimate_jobs(jobs, load_profile(args.profile), input_bundle, shared_macros, args.bytes_per_event, default_events_per_second=args.events_per_second)
+        stage_batch(args.stage, batch_name, jobs, input_bundle, args.macros_folder, shared_macros, estimates, bool(args.macro_store), requests)
+        print(f"Staged batch {batch_name} in {args.stage}: {format_estimates(estimates)}")
+        return
+    ledger.add_jobs(jobs)
+
+    # Generate a single Condor submit file, submit it in one call and record every macro with its proc ID
+    cluster_id, job_ids = submit_cluster(ledger, submit_folder, batch_name, jobs, input_bundle, args.macros_folder, shared_macros, requests, bool(args.macro_store))
+    if cluster_id:
+        print(f"Condor cluster {cluster_id} submitted successfully with {len(job_ids)} jobs.")
+    else:
+        print("Failed to submit Condor cluster.")
+
+def submit_each(args, submit_folder, ledger, timestamp, jobs, requests):
+    # Iterate 'times' and generate macros
+    for job in jobs:
+        job_timestamp = f"{timestamp}_{job['job_index']}"
+
+        # Call the function to generate macros
+        generate_geant4_macros(args.macros_folder, args.isotope, args.position, args.confine, job["seed1"], job["seed2"], args.num_events, job_timestamp, args.threads)
+        ledger.add_jobs([job])
+
+        # Generate Condor submit file
+        generate_condor_submit(submit_folder, args.isotope, args.confine, job_timestamp, requests)
+
+        # Submit Condor job and save job ID
+        job_id = submit_condor_job(submit_folder, job_timestamp, args.isotope, args.confine)
+        if job_id:
+            ledger.mark_submitted([job["name"]], [job_id])
+            print(f"Condor job {job_id} submitted successfully.")
+        else:
+            ledger.mark_submitted([job["name"]], [])
+            print("Failed to submit Condor job.")
 
 # Define the main function
 def main():
     # Parse command-line arguments
     args = parse_arguments()
 
+    # The run ends with a timing report, keep its spans
+    record_spans()
+
     # Ensure the macros folder exists
     os.makedirs(args.macros_folder, exist_ok=True)
+
+    # Pick the number of shards and their size from the measured throughput, which is per thread
+    profile = load_profile(args.profile)
+    if args.total_events is not None:
+        rate = events_per_second(profile, args.isotope, args.events_per_second, args.confine) * args.threads
+        args.times, args.num_events = plan_shards(args.total_events, rate, args.job_seconds)
+        print(f"Splitting {args.total_events} events into {args.times} jobs of {args.num_events} events ({rate:.1f} events/s).")
     
+    # Ask Condor for the memory, disk and cores measured for this configuration
+    requests = resource_requests(profile, [(args.isotope, args.confine, args.num_events, args.threads)])
+
     # Define the submit folder                                                                                         
     submit_folder = "."
 
-    # Generate log file path
-    log_file = f"macro_generation_{args.isotope}.log"
-    log_path = os.path.join(args.submit_folder, log_file)
+    # Isotopes resolved by earlier runs don't need radioactivedecay
+    load_nuclide_table(args.nuclide_table)
 
-    # Open log file to save seeds and macro generation info
-    with open(log_path, "w") as log:
-        log.write("Seed1\tSeed2\tConfinement\tNum Events\tMacro Generation Info\tJob ID\n")
+    # Reserve job indices and their seed pairs for the whole run
+    campaign_seed, job_indices, seeds = allocate_seeds(args.seed_state, args.times, args.campaign_seed)
+    print(f"Campaign seed {campaign_seed}, job indices {job_indices[0]}-{job_indices[-1]}")
 
-        # Iterate 'times' and generate macros
-        for i in range(args.times):
-            # Generate timestamp
-            timestamp = int(time.time())
+    # Job indices are unique within the campaign, so the timestamp only needs to be taken once
+    timestamp = int(time.time())
 
-            # Generate seeds
-            seed1, seed2 = generate_seeds()
+    # Describe every job for the job ledger
+    jobs = [
+        {"kind": "radioactive", "isotope": args.isotope, "confine": args.confine, "position": args.position, "num_events": args.num_events, "threads": args.threads, "job_index": int(job_index), "seed1": int(seed1), "seed2": int(seed2)}
+        for job_index, (seed1, seed2) in zip(job_indices, seeds)
+    ]
+    describe_jobs(jobs, timestamp, args.macros_folder, args.campaign or f"{args.isotope}_{args.confine}")
 
-            # Call the function to generate macros
-            generate_geant4_macros(args.macros_folder, args.isotope, args.position, args.confine, seed1, seed2, args.num_events, timestamp)
+    # Open the job ledger to save seeds, macros and job IDs
+    ledger = JobLedger(args.ledger)
 
-            # Generate Condor submit file
-            generate_condor_submit(submit_folder, args.isotope, args.confine, timestamp)
+    # Submit the whole campaign at once
+    if args.batch or args.stage:
+        submit_batch(args, submit_folder, ledger, timestamp, jobs, requests)
+    else:
+        submit_each(args, submit_folder, ledger, timestamp, jobs, requests)
+    ledger.close()
 
-            # Submit Condor job and save job ID
-            job_id = submit_condor_job(submit_folder, args.isotope, args.confine, timestamp)
-            if job_id:
-                log.write(f"{seed1}\t{seed2}\t{args.confine}\t{args.num_events}\tMacro {i+1}/{args.times}\t{job_id}\n")
-                print(f"Condor job {job_id} submitted successfully.")
-            else:
-                log.write(f"{seed1}\t{seed2}\t{args.confine}\t{args.num_events}\tMacro {i+1}/{args.times}\tFailed to submit job\n")
-                print("Failed to submit Condor job.")
+    # Keep the resolved isotopes for the next run
+    save_nuclide_table(args.nuclide_table)
 
-            # Introduce a one-second delay
-            time.sleep(1)
+    # Where the time of the run went
+    report_timing(len(jobs), args.trace)
 
 # Execute the main function if the script is run directly
 if __name__ == "__main__":
     main()
-
-
-
@@ -0,0 +1,118 @@
+import time
+import os
+import argparse
+import asyncio
+from condor.async_condor import AsyncCondor
+from condor.ledger import JobLedger
+from condor.timing import record_spans, report_timing
+from condor.planner import load_profile, resource_requests, job_configurations, split_by_threads
+from condor import load_campaign, expand_campaign, allocate_seeds, render_jobs, write_macros, describe_jobs, generate_condor_submit_batch, record_batch, submit_clusters, shared_input_bundle, load_nuclide_table, save_nuclide_table, render_overlays, job_includes
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Generate and submit the GEANT4 macros of a whole campaign.")
+    parser.add_argument("campaign", help="Campaign file (.json, .toml or .yaml).")
+    parser.add_argument("--macros_folder", help="Path to the folder to save the generated macros, overrides the campaign file.")
+    parser.add_argument("--seed_state", help="File holding the campaign master seed and the next free job index.")
+    parser.add_argument("--profile", default="throughput_profile.json", help="Throughput and resource usage measured from finished jobs, used for total_events entries and resource requests.")
+    parser.add_argument("--ledger", default="jobs.sqlite", help="Job ledger recording every job and its state.")
+    parser.add_argument("--schedd", action="append", help="Schedd to submit to, repeat it to spread the campaign over several schedds.")
+    parser.add_argument("--schedd_concurrency", type=int, default=2, help="Submissions in flight per schedd.")
+    parser.add_argument("--jobs_per_cluster", type=int, default=1000, help="Jobs per cluster when submitting to several schedds.")
+    parser.add_argument("--submit_timeout", type=float, default=300, help="Seconds before a submission is given up.")
+    parser.add_argument("--use_bindings", action="store_true", help="Submit through the htcondor Python bindings when they are installed.")
+    parser.add_argument("--nuclide_table", default="nuclide_table.json", help="On-disk cache of the isotope properties.")
+    parser.add_argument("--bundle_folder", help="Ship the inputs as one content-hashed bundle built in this folder.")
+    parser.add_argument("--bundle_url", help="Base URL the bundle folder is served from, workers then fetch the bundle through it.")
+    parser.add_argument("--macro_store", help="Keep one content-hashed macro body per configuration in this folder, each job only gets a small overlay macro.")
+    parser.add_argument("--trace", help="Also write the timing spans of the run to this Chrome trace file (chrome://tracing, Perfetto).")
+    return parser.parse_args()
+
+def submit_to_schedds(args, submit_folder, ledger, jobs, batch_prefix, input_bundle, macros_folder, shared_macros, profile):
+    # Cut the campaign into clusters of at most --jobs_per_cluster jobs with the same number of threads,
+    # each one asking for what its most demanding configuration used
+    batches = {}
+    for group in split_by_threads(jobs):
+        for start in range(0, len(group), args.jobs_per_cluster):
+            cluster_jobs = group[start:start + args.jobs_per_cluster]
+            batch_name = f"{batch_prefix}_{cluster_jobs[0]['job_index']}"
+            batches[batch_name] = cluster_jobs
+            requests = resource_requests(profile, job_configurations(cluster_jobs))
+            generate_condor_submit_batch(submit_folder, batch_name, [job["name"] for job in cluster_jobs], input_bundle, macros_folder, shared_macros, requests)
+
+    # Feed all schedds in parallel, each one with a bounded number of submissions in flight
+    engine = AsyncCondor(args.schedd, args.schedd_concurrency, args.submit_timeout, args.use_bindings)
+    results = asyncio.run(engine.submit_batches(submit_folder, list(batches)))
+
+    # Record every macro with its proc ID and schedd
+    for batch_name, (schedd, cluster_id, job_ids) in results.items():
+        record_batch(ledger, batches[batch_name], job_ids, bool(args.macro_store), schedd)
+    submitted = sum(len(job_ids) for _, _, job_ids in results.values())
+    print(f"{submitted} of {len(jobs)} jobs submitted to {len(args.schedd)} schedds.")
+
+def main():
+    # Parse command-line arguments
+    args = parse_arguments()
+
+    # The run ends with a timing report, keep its spans
+    record_spans()
+
+    # Read the campaign and expand it into one entry per job
+    campaign = load_campaign(args.campaign)
+    campaign_name = campaign.get("name", os.path.splitext(os.path.basename(args.campaign))[0])
+    macros_folder = args.macros_folder or campaign.get("macros_folder", "macros")
+    seed_state = args.seed_state or f"campaign_seeds_{campaign_name}.json"
+    profile = load_profile(args.profile)
+    jobs = expand_campaign(campaign, profile)
+    if not jobs:
+        print(f"Campaign {campaign_name} has no jobs.")
+        return
+
+    # Define the submit folder
+    submit_folder = "."
+
+    # Reserve job indices and their seed pairs for every job at once
+    load_nuclide_table(args.nuclide_table)
+    campaign_seed, job_indices, seeds = allocate_seeds(seed_state, len(jobs), campaign.get("campaign_seed"))
+    print(f"Campaign {campaign_name}: {len(jobs)} jobs, campaign seed {campaign_seed}, job indices {job_indices[0]}-{job_indices[-1]}")
+    for job, job_index, (seed1, seed2) in zip(jobs, job_indices, seeds):
+        job.update(job_index=int(job_index), seed1=int(seed1), seed2=int(seed2))
+
+    # Render and write all macros in one batch, or only the per-job overlays of the macro store
+    timestamp = int(time.time())
+    describe_jobs(jobs, timestamp, macros_folder, campaign_name)
+    shared_macros = []
+    if args.macro_store:
+        macros, shared_macros = render_overlays(jobs, args.macro_store)
+        write_macros(macros_folder, macros)
+    else:
+        write_macros(macros_folder, render_jobs(jobs))
+        shared_macros = job_includes(jobs)
+    save_nuclide_table(args.nuclide_table)
+
+    # Record every job in the job ledger
+    ledger = JobLedger(args.ledger)
+    ledger.add_jobs(jobs)
+
+    # Spread the campaign over several schedds
+    input_bundle = shared_input_bundle(args)
+    if args.schedd:
+        submit_to_schedds(args, submit_folder, ledger, jobs, f"{campaign_name}_{timestamp}", input_bundle, macros_folder, shared_macros, profile)
+        ledger.close()
+        report_timing(len(jobs), args.trace)
+        return
+
+    # Submit the campaign as one cluster per number of threads
+    clusters = submit_clusters(ledger, submit_folder, f"{campaign_name}_{timestamp}", jobs, profile, input_bundle, macros_folder, shared_macros, bool(args.macro_store))
+    for cluster_id, job_ids in clusters:
+        if cluster_id:
+            print(f"Condor cluster {cluster_id} submitted successfully with {len(job_ids)} jobs.")
+        else:
+            print("Failed to submit Condor cluster.")
+    ledger.close()
+
+    # Where the time of the run went
+    report_timing(len(jobs), args.trace)
+
+# Execute the main function if the script is run directly
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import os
+import subprocess
+import monitor
+from condor.ledger import JobLedger
+
+SAMPLE_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sample.log")
+
+def ledger_with_jobs(tmp_path, statuses):
+    # One submitted job per status, with the job IDs of the sample log
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite"))
+    names = [f"job_{index}" for index in range(len(statuses))]
+    ledger.add_jobs([{"name": name, "campaign": "test", "job_index": index, "kind": "radioactive", "isotope": "Rn222", "confine": "Gas", "num_events": 1000} for index, name in enumerate(names)])
+    ledger.mark_submitted(names, [f"1234.{index}" for index in range(len(statuses))])
+    for name, status in zip(names, statuses):
+        if status != "submitted":
+            ledger.set_status([name], status)
+    return ledger
+
+def statuses(ledger):
+    return {row["job_id"]: row["status"] for row in ledger.select()}
+
+def test_final_states_are_kept(tmp_path):
+    ledger = ledger_with_jobs(tmp_path, ["merged", "retrieved"])
+    assert ledger.update_states({"1234.0": {"status": "completed"}, "1234.1": {"status": "held"}}) == 0
+    assert statuses(ledger) == {"1234.0": "merged", "1234.1": "retrieved"}
+
+def test_replayed_log(tmp_path, monkeypatch):
+    # Job 1234.0 was merged long ago, 1234.1 is still tracked
+    ledger = ledger_with_jobs(tmp_path, ["merged", "submitted"])
+    retrieved = []
+    monkeypatch.setattr(monitor, "retrieve_completed", lambda job_ids, schedd=None: retrieved.extend(job_ids))
+
+    # No state file, so the whole log is read again
+    monitor.watch(ledger, [SAMPLE_LOG], 0, str(tmp_path / "state.json"), str(tmp_path / "profile.json"))
+    assert retrieved == []
+    assert statuses(ledger) == {"1234.0": "merged", "1234.1": "held"}
+
+def test_failed_retrieval(tmp_path, monkeypatch):
+    ledger = ledger_with_jobs(tmp_path, ["submitted", "submitted"])
+
+    def fail(job_ids, schedd=None):
+        raise subprocess.CalledProcessError(1, "condor_transfer_data")
+    monkeypatch.setattr(monitor, "retrieve_completed", fail)
+
+    # The watcher keeps going and the job is left for retrieve.py
+    state = str(tmp_path / "state.json")
+    monitor.watch(ledger, [SAMPLE_LOG], 0, state, str(tmp_path / "profile.json"))
+    assert os.path.exists(state)
+    assert statuses(ledger) == {"1234.0": "completed", "1234.1": "held"}
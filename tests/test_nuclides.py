@@ -0,0 +1,27 @@
+import json
+import pytest
+from condor import nuclides
+
+@pytest.fixture(autouse=True)
+def empty_table(monkeypatch):
+    monkeypatch.setattr(nuclides, "NUCLIDE_TABLE", {})
+
+def test_spellings():
+    for isotope in ("Ag108m", "Ag-108m", "108mAg"):
+        assert nuclides.get_metastable_energy(isotope, "m") == 109.466
+    assert nuclides.get_metastable_energy("Ir-192n", "n") == 168.14
+
+def test_ambiguous_state():
+    with pytest.raises(ValueError):
+        nuclides.get_metastable_energy("Ta-178m", "m")
+
+def test_saved_energy_is_not_trusted(tmp_path):
+    # A table written before the Hf178m energy was corrected
+    path = tmp_path / "nuclide_table.json"
+    path.write_text(json.dumps({"Hf178m": {"Z": 72, "A": 178, "state": "m", "excitation_energy_keV": 1147.416}}))
+    nuclides.load_nuclide_table(str(path))
+    assert nuclides.nuclide_properties("Hf178m")["excitation_energy_keV"] == 2446.09
+
+    # Only Z, A and the state are written back
+    nuclides.save_nuclide_table(str(path))
+    assert json.loads(path.read_text()) == {"Hf178m": {"Z": 72, "A": 178, "state": "m"}}
@@ -0,0 +1,74 @@
+import os
+import asyncio
+import json
+import subprocess
+import pytest
+from condor.monitoring import job_constraint, retrieve_completed
+from condor.retrieval import retrieve_concurrently
+
+FAKE_CONDOR_BIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fake_condor", "bin")
+
+@pytest.fixture
+def fake_condor(tmp_path, monkeypatch):
+    # A fake pool with one cluster of three completed jobs
+    monkeypatch.setenv("PATH", FAKE_CONDOR_BIN + os.pathsep + os.environ["PATH"])
+    monkeypatch.setenv("FAKE_CONDOR_STATE", str(tmp_path / "fake_condor"))
+    monkeypatch.setenv("FAKE_CONDOR_COMPLETED", "1")
+    submit_file = tmp_path / "job.sub"
+    submit_file.write_text("executable = /bin/true\nqueue 3\n")
+    subprocess.run(["condor_submit", "-terse", str(submit_file)], check=True, capture_output=True)
+    return tmp_path / "fake_condor" / "queue.json"
+
+def queued(queue_file):
+    with open(queue_file) as f:
+        return sorted(json.load(f)["queue"])
+
+def test_job_constraint():
+    assert job_constraint(["12.1", "3.0", "12.0"]) == "(ClusterId == 3 && (ProcId == 0)) || (ClusterId == 12 && (ProcId == 0 || ProcId == 1))"
+
+def test_retrieve_only_given_jobs(fake_condor):
+    # 1.2 completed after the query, it stays in the queue for the next sweep
+    retrieve_completed(["1.0", "1.1"])
+    assert queued(fake_condor) == ["1.2"]
+
+def test_retrieve_concurrently_only_given_jobs(fake_condor):
+    assert retrieve_concurrently({"": ["1.1"]}) == {"": ["1.1"]}
+    assert queued(fake_condor) == ["1.0", "1.2"]
+
+def test_removing_nothing_fails(fake_condor):
+    # Jobs already transferred and removed are no longer in the queue, condor_rm fails like the real one
+    retrieve_completed(["1.0"])
+    with pytest.raises(subprocess.CalledProcessError):
+        retrieve_completed(["1.0"])
+    assert subprocess.run(["condor_rm", "1.0"], capture_output=True).returncode == 1
+
+def test_check_inside_event_loop(fake_condor, tmp_path):
+    # A daemon awaits the check from its own event loop
+    from condor.ledger import JobLedger
+    from condor.monitoring import check_jobs_async
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite"))
+    ledger.add_jobs([{"name": "job_0", "campaign": "test", "job_index": 0}])
+    ledger.mark_submitted(["job_0"], ["1.0"])
+
+    async def daemon():
+        return await check_jobs_async(ledger)
+    assert asyncio.run(daemon())[""]["1.0"]["status"] == "completed"
+    assert ledger.select()[0]["status"] == "retrieved"
+
+def test_resubmit_to_recorded_schedd(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", FAKE_CONDOR_BIN + os.pathsep + os.environ["PATH"])
+    monkeypatch.setenv("FAKE_CONDOR_STATE", str(tmp_path / "fake_condor"))
+    from condor.ledger import JobLedger
+    from condor.monitoring import resubmit_jobs
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite"))
+    macro = tmp_path / "macros" / "job_0.mac"
+    macro.parent.mkdir()
+    macro.write_text("/run/beamOn 10\n")
+    ledger.add_jobs([{"name": "job_0", "campaign": "test", "job_index": 0, "kind": "radioactive", "isotope": "Rn222", "confine": "Gas", "num_events": 10, "macro": str(macro)}])
+    ledger.mark_submitted(["job_0"], ["7.0"], "b")
+    ledger.set_status(["job_0"], "lost")
+
+    resubmit_jobs(ledger, ledger.select(), str(tmp_path), 0)
+    job = ledger.select()[0]
+    assert (job["schedd"], job["job_id"]) == ("b", "1.0")
+    assert os.path.exists(tmp_path / "fake_condor" / "queue_b.json")
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from condor.seeds import SEED_MASK, FEISTEL_ROUNDS, derive_seeds, allocate_seeds
+
+def round_function(right, key):
+    mixed = (right * np.uint64(0x9E3779B1) + key) & np.uint64(SEED_MASK)
+    mixed ^= mixed >> np.uint64(15)
+    mixed = (mixed * np.uint64(0x2C1B3C6D)) & np.uint64(SEED_MASK)
+    mixed ^= mixed >> np.uint64(12)
+    return mixed
+
+def unique_pairs(seeds):
+    return len(np.unique(seeds, axis=0)) == len(seeds)
+
+def test_large_index_range():
+    # Both sides of every 31-bit boundary and the end of the index space
+    indices = np.concatenate([
+        np.arange(0, 50000),
+        np.arange(SEED_MASK - 50000, SEED_MASK + 50000),
+        np.arange(SEED_MASK * SEED_MASK - 50000, SEED_MASK * SEED_MASK, dtype=np.uint64).astype(np.int64),
+    ])
+    seeds = derive_seeds(12345, indices)
+    assert unique_pairs(seeds)
+    assert seeds.min() >= 1 and seeds.max() <= 2**31 - 1
+    with pytest.raises(ValueError):
+        derive_seeds(12345, [SEED_MASK * SEED_MASK])
+
+def test_seed_never_reaches_2_31():
+    # Find the job index the network maps onto a half of 2**31 - 1 by running it backwards
+    campaign_seed = 12345
+    keys = np.random.SeedSequence(campaign_seed).generate_state(FEISTEL_ROUNDS, dtype=np.uint64) & np.uint64(SEED_MASK)
+    for right in range(1000):
+        left, right = np.uint64(SEED_MASK), np.uint64(right)
+        for key in keys[::-1]:
+            left, right = right ^ round_function(left, key), left
+        if left < SEED_MASK and right < SEED_MASK:
+            break
+    job_index = int(left) * SEED_MASK + int(right)
+    seeds = derive_seeds(campaign_seed, [job_index, job_index + 1])
+    assert seeds.max() <= 2**31 - 1
+    assert unique_pairs(seeds)
+
+def test_allocate_disjoint_blocks(tmp_path):
+    state = str(tmp_path / "seeds.json")
+    campaign_seed, first_indices, first_seeds = allocate_seeds(state, 100, 42)
+    _, second_indices, second_seeds = allocate_seeds(state, 50)
+    assert campaign_seed == 42
+    assert list(first_indices) == list(range(100)) and list(second_indices) == list(range(100, 150))
+    assert unique_pairs(np.concatenate([first_seeds, second_seeds]))
+    with pytest.raises(ValueError):
+        allocate_seeds(state, 1, 43)
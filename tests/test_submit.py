@@ -0,0 +1,52 @@
+import os
+import sys
+import json
+import sqlite3
+import subprocess
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DRIVERS = {
+    "submit.py": ["--isotope", "Rn222", "--position", "0 0 0", "--confine", "Gas"],
+    "submit_gamma_background.py": [],
+}
+
+@pytest.fixture
+def environment(tmp_path):
+    # Fake pool, a single input file and an isotope that needs no radioactivedecay lookup
+    (tmp_path / "CYGNO").write_text("binary")
+    (tmp_path / "condor.json").write_text(json.dumps({"input_files": [str(tmp_path / "CYGNO")]}))
+    (tmp_path / "nuclide_table.json").write_text(json.dumps({"Rn222": {"Z": 86, "A": 222, "state": ""}}))
+    return dict(
+        os.environ,
+        PATH=os.path.join(ROOT, "fake_condor", "bin") + os.pathsep + os.environ["PATH"],
+        FAKE_CONDOR_STATE=str(tmp_path / "fake_condor"),
+        CYGNO_CONDOR_CONFIG=str(tmp_path / "condor.json"),
+    )
+
+def run(driver, tmp_path, environment, *args):
+    command = [sys.executable, os.path.join(ROOT, driver), *DRIVERS[driver], "--num_events", "10", "--times", "2", "--macros_folder", "macros", *args]
+    return subprocess.run(command, cwd=tmp_path, env=environment, capture_output=True, text=True)
+
+@pytest.mark.parametrize("driver", DRIVERS)
+def test_batch_with_bundle(driver, tmp_path, environment):
+    result = run(driver, tmp_path, environment, "--batch", "--bundle_folder", "bundles")
+    assert result.returncode == 0, result.stderr
+    assert any(name.endswith(".tar.gz") for name in os.listdir(tmp_path / "bundles"))
+    with sqlite3.connect(tmp_path / "jobs.sqlite") as connection:
+        assert connection.execute("SELECT COUNT(*) FROM jobs WHERE status = 'submitted'").fetchone()[0] == 2
+
+@pytest.mark.parametrize("driver", DRIVERS)
+def test_bundle_needs_batch(driver, tmp_path, environment):
+    result = run(driver, tmp_path, environment, "--bundle_folder", "bundles")
+    assert result.returncode == 2
+    assert "--bundle_folder and --bundle_url need --batch or --stage" in result.stderr
+
+@pytest.mark.parametrize("driver", DRIVERS)
+def test_stage_estimates_with_given_throughput(driver, tmp_path, environment):
+    # 10 events per thread and second: 2 jobs of 36000 events on 4 threads are 2 CPU-hours
+    command = [sys.executable, os.path.join(ROOT, driver), *DRIVERS[driver], "--num_events", "36000", "--times", "2", "--threads", "4", "--stage", "staged", "--events_per_second", "10"]
+    result = subprocess.run(command, cwd=tmp_path, env=environment, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert "2.0 CPU-hours" in result.stdout
+    assert "without a measured throughput" not in result.stdout
@@ -0,0 +1,91 @@
+import os
+import shutil
+from condor.userlog import UserLogWatcher, parse_events
+
+SAMPLE_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sample.log")
+
+# Event 005 of job 1234.2, cut after its first lines as if Condor were still writing it
+PARTIAL_EVENT = "005 (1234.002.000) 2024-05-01 12:40:00 Job terminated.\n\t(1) Normal termination (return value 3)\n"
+
+def copy_sample(tmp_path):
+    log_file = str(tmp_path / "sample.log")
+    shutil.copy(SAMPLE_LOG, log_file)
+    return log_file
+
+def test_parse_events():
+    with open(SAMPLE_LOG) as f:
+        events = parse_events(f.read())
+
+    assert [code for code, _, _, _ in events] == ["000", "000", "001", "001", "006", "006", "012", "005"]
+    assert events[-1][1] == "1234.0"
+    assert events[-1][2] == "2024-05-01 12:31:00"
+
+def test_terminated_job():
+    watcher = UserLogWatcher([SAMPLE_LOG])
+    assert sorted(watcher.poll()) == ["1234.0", "1234.1"]
+
+    job = watcher.jobs["1234.0"]
+    assert job["status"] == "completed"
+    assert job["exit_code"] == 0
+    assert job["wall_seconds"] == 30 * 60
+    assert job["cpu_seconds"] == 29 * 60
+    assert job["memory_mb"] == 512
+    assert job["cpus"] == 0.97
+    assert job["disk_kb"] == 20480
+
+def test_held_job():
+    watcher = UserLogWatcher([SAMPLE_LOG])
+    watcher.poll()
+
+    job = watcher.jobs["1234.1"]
+    assert job["status"] == "held"
+    assert job["exit_code"] is None
+    assert job["hold_reason"] == "Error from slot1@wn02: Job has gone over memory limit of 1024 megabytes."
+
+def test_offsets(tmp_path):
+    log_file = copy_sample(tmp_path)
+    watcher = UserLogWatcher([log_file])
+    watcher.poll()
+    assert watcher.offsets[log_file] == os.path.getsize(log_file)
+
+    # Nothing new, nothing parsed
+    assert watcher.poll() == []
+
+    # A new watcher resuming from the saved state only sees what was appended since
+    state = str(tmp_path / "state.json")
+    watcher.save_state(state)
+    with open(log_file, "a") as f:
+        f.write("001 (1234.001.000) 2024-05-01 12:35:00 Job executing on host: <10.0.0.3:9618>\n...\n")
+    resumed = UserLogWatcher([log_file])
+    resumed.load_state(state)
+    assert resumed.read_new_events(log_file) == [("001", "1234.1", "2024-05-01 12:35:00", [])]
+
+def test_partial_trailing_event(tmp_path):
+    log_file = copy_sample(tmp_path)
+    size = os.path.getsize(log_file)
+    with open(log_file, "a") as f:
+        f.write(PARTIAL_EVENT)
+
+    # The unfinished event is left for the next poll
+    watcher = UserLogWatcher([log_file])
+    assert "1234.2" not in watcher.poll()
+    assert watcher.offsets[log_file] == size
+    assert "1234.2" not in watcher.jobs
+
+    with open(log_file, "a") as f:
+        f.write("\t\tUsr 0 00:01:00, Sys 0 00:00:01  -  Run Remote Usage\n...\n")
+    assert watcher.poll() == ["1234.2"]
+    assert watcher.jobs["1234.2"]["exit_code"] == 3
+    assert watcher.offsets[log_file] == os.path.getsize(log_file)
+
+def test_rewritten_log(tmp_path):
+    log_file = copy_sample(tmp_path)
+    watcher = UserLogWatcher([log_file])
+    watcher.poll()
+
+    # A log that shrank is read again from the start
+    with open(SAMPLE_LOG) as f:
+        first_event = "".join(f.readlines()[:2])
+    with open(log_file, "w") as f:
+        f.write(first_event)
+    assert watcher.read_new_events(log_file) == [("000", "1234.0", "2024-05-01 12:00:00", [])]